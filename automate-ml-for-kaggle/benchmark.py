@@ -0,0 +1,111 @@
+"""Benchmarks for the Kaggle workflow's data handling.
+
+Usage:
+    python benchmark.py dataset [--scale 20] [--csv house_prices_train.csv]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from dataset_store import downcast, load_dataset, prepare_dataset
+
+
+def scaled_dataset(csv_path: str, scale: int, path: str) -> str:
+    """Write `scale` copies of a CSV file's rows, with new ids, to `path`."""
+    df = pd.read_csv(csv_path)
+    scaled = pd.concat([df] * scale, ignore_index=True)
+    if "Id" in scaled.columns:
+        scaled["Id"] = range(1, len(scaled) + 1)
+    scaled.to_csv(path, index=False)
+    return path
+
+
+def _status_mb(field: str) -> float:
+    # Current memory from /proc, 0 where it isn't available
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def measure_load(path: str) -> dict:
+    """Load a dataset in this process, measuring the time and the memory it adds."""
+    before = _status_mb("VmRSS")
+    started = time.perf_counter()
+    df = load_dataset(path)
+    seconds = time.perf_counter() - started
+    # Touch every column, as training would
+    df.count()
+    return {
+        "seconds": seconds,
+        "rss_mb": _status_mb("VmRSS") - before,
+        "frame_mb": df.memory_usage(deep=True).sum() / 2**20,
+    }
+
+
+def benchmark_dataset(csv_path: str, scale: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        csv = scaled_dataset(
+            csv_path, scale, os.path.join(directory, "house_prices_scaled.csv")
+        )
+        print(
+            f"{scale}x {csv_path}: {os.path.getsize(csv) / 2**20:.1f} MB CSV "
+            f"({sum(1 for _ in open(csv)) - 1} rows)"
+        )
+
+        started = time.perf_counter()
+        arrow = prepare_dataset(csv, data_dir=directory)
+        prepare_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        prepare_dataset(csv, data_dir=directory)
+        cached_seconds = time.perf_counter() - started
+        parquet = os.path.join(directory, "house_prices_scaled.parquet")
+        downcast(pd.read_csv(csv)).to_parquet(parquet)
+        print(
+            f"Preparation: {prepare_seconds:.2f}s on first use, {cached_seconds:.3f}s once prepared "
+            f"(Arrow {os.path.getsize(arrow) / 2**20:.1f} MB, Parquet {os.path.getsize(parquet) / 2**20:.1f} MB)"
+        )
+
+        # Each load in a fresh process, like a new or restarted kernel
+        print("| Format | Load (s) | RSS added (MB) | Frame (MB) |")
+        print("| --- | --- | --- | --- |")
+        for name, path in [("CSV", csv), ("Parquet", parquet), ("Arrow (mmap)", arrow)]:
+            output = subprocess.run(
+                [sys.executable, __file__, "_load", path],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"| {name} | {result['seconds']:.3f} | {result['rss_mb']:.0f} | {result['frame_mb']:.0f} |"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    dataset = commands.add_parser(
+        "dataset", help="CSV vs Parquet vs memory-mapped Arrow load time and memory"
+    )
+    dataset.add_argument("--scale", type=int, default=20)
+    dataset.add_argument("--csv", default="house_prices_train.csv")
+    load = commands.add_parser("_load")
+    load.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "dataset":
+        benchmark_dataset(args.csv, args.scale)
+    elif args.command == "_load":
+        print(json.dumps(measure_load(args.path)))
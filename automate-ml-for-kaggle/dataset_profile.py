@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+PROFILE_CACHE_DIR = os.environ.get("PROFILE_CACHE_DIR", ".profile_cache")
+
+QUANTILES = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+# Correlation above which a feature is flagged, with the target as possible leakage, or with another feature
+LEAKAGE_CORRELATION = 0.95
+REDUNDANT_CORRELATION = 0.9
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _value(value):
+    # JSON friendly scalars
+    if isinstance(value, (np.integer, np.floating)):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def compute_profile(df: pd.DataFrame, target_column: Optional[str] = None) -> dict:
+    """Profile every column of a DataFrame with whole-frame operations rather than per-column code."""
+    numeric = df.select_dtypes("number")
+    null_ratios = df.isna().mean()
+    cardinality = df.nunique()
+    quantiles = numeric.quantile(QUANTILES)
+    correlations = numeric.corr()
+    top_values = {
+        column: df[column].value_counts().head(3).to_dict()
+        for column in df.columns.difference(numeric.columns)
+    }
+
+    columns = {}
+    for column in df.columns:
+        info = {
+            "dtype": str(df[column].dtype),
+            "null_ratio": _value(null_ratios[column]),
+            "cardinality": _value(cardinality[column]),
+        }
+        if column in numeric.columns:
+            info["quantiles"] = [_value(v) for v in quantiles[column]]
+        else:
+            info["top_values"] = {
+                str(k): _value(v) for k, v in top_values[column].items()
+            }
+        columns[column] = info
+
+    # Pairs of different features that are strongly correlated, each pair once
+    upper = correlations.where(np.triu(np.ones(correlations.shape, dtype=bool), k=1))
+    pairs = upper.stack()
+    redundant = [
+        [a, b, round(_value(r), 3)]
+        for (a, b), r in pairs[pairs.abs() >= REDUNDANT_CORRELATION].items()
+        if target_column not in (a, b)
+    ]
+
+    target = {}
+    leakage = []
+    if target_column in df.columns:
+        target["column"] = target_column
+        if target_column in correlations.columns:
+            with_target = correlations[target_column].drop(target_column).dropna()
+            top = with_target.abs().sort_values(ascending=False).head(10).index
+            target["top_correlations"] = {
+                column: round(_value(with_target[column]), 3) for column in top
+            }
+            leakage += [
+                f"{column} correlates {with_target[column]:.3f} with {target_column}"
+                for column in with_target.index[
+                    with_target.abs() >= LEAKAGE_CORRELATION
+                ]
+            ]
+    # Identifiers: a distinct value on every row, they can't generalize to new rows
+    leakage += [
+        f"{column} is unique on every row (an identifier?)"
+        for column in df.columns[cardinality == len(df)]
+        if column != target_column
+    ]
+
+    return {
+        "rows": len(df),
+        "columns": columns,
+        "memory_mb": round(df.memory_usage(deep=True).sum() / 2**20, 2),
+        "duplicate_rows": int(df.duplicated().sum()),
+        "target": target,
+        "redundant_pairs": redundant,
+        "leakage_hints": leakage,
+    }
+
+
+def profile_dataset(
+    path: str, target_column: Optional[str] = None, cache_dir: str = PROFILE_CACHE_DIR
+) -> dict:
+    """The profile of a CSV file, computed once per file content and target column."""
+    key = file_hash(path)
+    cache_path = os.path.join(cache_dir, f"{key[:32]}-{target_column or ''}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path) as file:
+            print(f"Dataset profile of {path} read from cache")
+            return json.load(file)
+
+    profile = compute_profile(pd.read_csv(path), target_column)
+    profile["path"] = path
+    profile["sha256"] = key
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path, "w") as file:
+        json.dump(profile, file)
+    return profile
+
+
+def _short(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def summarize_profile(profile: dict) -> str:
+    """A compact text version of a profile for the agents, one line per column."""
+    lines = [
+        f"Dataset {profile.get('path', '')}: {profile['rows']} rows, {len(profile['columns'])} columns, "
+        f"{profile['memory_mb']} MB in memory, {profile['duplicate_rows']} duplicate rows.",
+        "Columns (dtype, null %, distinct values, min/25%/50%/75%/max or top values):",
+    ]
+    for column, info in profile["columns"].items():
+        if "quantiles" in info:
+            stats = "/".join(_short(v) for v in info["quantiles"])
+        else:
+            stats = ", ".join(f"{k} ({v})" for k, v in info["top_values"].items())
+        lines.append(
+            f"- {column}: {info['dtype']}, {info['null_ratio'] * 100:.1f}% null, "
+            f"{info['cardinality']} distinct, {stats}"
+        )
+
+    missing = [c for c, info in profile["columns"].items() if info["null_ratio"] > 0]
+    lines.append(f"Columns with missing values: {', '.join(missing) or 'none'}")
+    target = profile["target"]
+    if target.get("top_correlations"):
+        lines.append(
+            f"Top correlations with {target['column']}: "
+            + ", ".join(f"{c} {r}" for c, r in target["top_correlations"].items())
+        )
+    if profile["redundant_pairs"]:
+        lines.append(
+            "Strongly correlated feature pairs: "
+            + ", ".join(f"{a}~{b} {r}" for a, b, r in profile["redundant_pairs"])
+        )
+    lines.append(
+        "Target leakage hints: " + ("; ".join(profile["leakage_hints"]) or "none")
+    )
+    return "\n".join(lines)
@@ -0,0 +1,95 @@
+import glob
+import os
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from dataset_profile import file_hash
+
+DATASET_DIR = os.environ.get("DATASET_DIR", "data")
+
+# Text columns with fewer distinct values than this share of the rows are stored as categories
+CATEGORY_RATIO = 0.5
+
+
+def downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """The smallest integer and float dtypes that hold the values, and categories for repetitive text."""
+    dtypes = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_integer_dtype(values):
+            dtypes[column] = pd.to_numeric(values, downcast="integer").dtype
+        elif pd.api.types.is_float_dtype(values):
+            dtypes[column] = pd.to_numeric(values, downcast="float").dtype
+        elif not pd.api.types.is_numeric_dtype(values) and (
+            values.nunique() < CATEGORY_RATIO * len(values)
+        ):
+            dtypes[column] = "category"
+    return df.astype(dtypes)
+
+
+def write_arrow(df: pd.DataFrame, path: str) -> str:
+    """Save a frame as an uncompressed Arrow file, which can be memory-mapped when read back."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    df = df.rename(columns=str)
+    feather.write_feather(df, path, compression="uncompressed")
+    return path
+
+
+def read_arrow(path: str) -> pd.DataFrame:
+    """Load an Arrow file through a memory map instead of reading it into a buffer.
+
+    Processes loading the same file share its pages in the OS cache.
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def prepare_dataset(csv_path: str, data_dir: str = DATASET_DIR) -> str:
+    """Convert a CSV file to a downcast Arrow file once per file content, returning its path."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    path = os.path.join(data_dir, f"{stem}-{file_hash(csv_path)[:12]}.arrow")
+    if not os.path.exists(path):
+        write_arrow(downcast(pd.read_csv(csv_path)), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        print(f"Prepared {csv_path} as {path}")
+    return path
+
+
+def load_dataset(path: str) -> pd.DataFrame:
+    """Load a dataset prepared by prepare_dataset, or any CSV or Parquet file."""
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, memory_map=True)
+    return read_arrow(path)
+
+
+def _snapshot_paths(name: str, data_dir: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(data_dir, "snapshots", name, "v*.parquet")))
+
+
+def save_snapshot(df: pd.DataFrame, name: str, data_dir: str = DATASET_DIR) -> str:
+    """Save a processed frame as the next version of the `name` snapshot, returning its path."""
+    version = len(_snapshot_paths(name, data_dir)) + 1
+    path = os.path.join(data_dir, "snapshots", name, f"v{version:03d}.parquet")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.rename(columns=str).to_parquet(path)
+    print(f"Saved {name} version {version}: {path}")
+    return path
+
+
+def load_snapshot(
+    name: str, version: Optional[int] = None, data_dir: str = DATASET_DIR
+) -> pd.DataFrame:
+    """Load a version of the `name` snapshot, the latest by default."""
+    if version is None:
+        paths = _snapshot_paths(name, data_dir)
+        if not paths:
+            raise FileNotFoundError(f"No snapshot named {name} in {data_dir}")
+        path = paths[-1]
+    else:
+        path = os.path.join(data_dir, "snapshots", name, f"v{version:03d}.parquet")
+    return pd.read_parquet(path, memory_map=True)
@@ -0,0 +1,174 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from autogen.coding import CodeBlock, MarkdownCodeExtractor
+from autogen.coding.jupyter import JupyterCodeExecutor
+
+# Run in each kernel before it is handed out, so the agents' first cells don't pay for these imports
+PRELOAD_CODE = """
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import seaborn as sns
+import sklearn
+from sklearn.model_selection import train_test_split
+from dataset_store import load_dataset, save_snapshot, load_snapshot
+"""
+
+
+class KernelPool:
+    """Jupyter kernels started ahead of time with the common data science stack imported.
+
+    `size` kernels are started and warmed in the background on creation. `acquire` hands out a warm
+    kernel, waiting for one if none is ready yet and starting one if none is on the way. `release`
+    restarts a kernel after its session and warms it again for the next one, or stops it once the pool
+    is closing.
+    """
+
+    def __init__(
+        self,
+        server,
+        size: int = 1,
+        output_dir: Path = Path("."),
+        preload: str = PRELOAD_CODE,
+        kernel_name: str = "python3",
+        timeout: int = 60,
+    ):
+        self.server = server
+        self.output_dir = output_dir
+        self.preload = preload
+        self.kernel_name = kernel_name
+        self.timeout = timeout
+        self.started = 0
+        self.recycled = 0
+        self._ready = queue.Queue()
+        self._pending = 0
+        self._closing = False
+        self._lock = threading.Lock()
+        self._workers = ThreadPoolExecutor(max_workers=max(size, 1))
+        for _ in range(size):
+            self._submit(self._start)
+
+    def _submit(self, function, *args) -> None:
+        with self._lock:
+            self._pending += 1
+        self._workers.submit(self._prepare, function, *args)
+
+    def _prepare(self, function, *args) -> None:
+        # Errors go through the queue too, so that acquire raises them instead of waiting forever
+        try:
+            executor = function(*args)
+            result = executor.execute_code_blocks(
+                [CodeBlock(code=self.preload, language="python")]
+            )
+            if result.exit_code != 0:
+                print(
+                    f"Kernel warm-up failed, some imports are missing: {result.output}"
+                )
+            self._ready.put(executor)
+        except Exception as e:
+            self._ready.put(e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _start(self) -> JupyterCodeExecutor:
+        executor = JupyterCodeExecutor(
+            self.server,
+            kernel_name=self.kernel_name,
+            timeout=self.timeout,
+            output_dir=self.output_dir,
+        )
+        with self._lock:
+            self.started += 1
+        return executor
+
+    def _recycle(self, executor: JupyterCodeExecutor) -> JupyterCodeExecutor:
+        executor.restart()
+        with self._lock:
+            self.recycled += 1
+        return executor
+
+    def acquire(self) -> JupyterCodeExecutor:
+        with self._lock:
+            cold = self._ready.empty() and self._pending == 0
+        if cold:
+            self._submit(self._start)
+        executor = self._ready.get()
+        if isinstance(executor, Exception):
+            raise executor
+        return executor
+
+    def release(self, executor: JupyterCodeExecutor) -> None:
+        with self._lock:
+            if not self._closing:
+                self._pending += 1
+                self._workers.submit(self._prepare, self._recycle, executor)
+                return
+        # No session will need it again, so don't restart and warm it only to stop it
+        executor.stop()
+
+    def close(self) -> None:
+        """Stop the kernels once the pending ones are ready, and any kernel released afterwards."""
+        with self._lock:
+            self._closing = True
+        self._workers.shutdown(wait=True)
+        while not self._ready.empty():
+            executor = self._ready.get()
+            if not isinstance(executor, Exception):
+                executor.stop()
+
+
+class KernelSession:
+    """A code executor taking a warm kernel from a KernelPool at its first cell.
+
+    Records how long the first cell took to run from the moment it was submitted, including any wait
+    for a kernel, and gives the kernel back to the pool on close.
+    """
+
+    def __init__(self, pool: KernelPool):
+        self.pool = pool
+        self.executor = None
+        self.created = time.perf_counter()
+        self.first_cell_seconds = None
+        self.first_cell_after = None
+        self.kernel_wait_seconds = None
+        self._lock = threading.Lock()
+
+    @property
+    def code_extractor(self):
+        return MarkdownCodeExtractor()
+
+    def execute_code_blocks(self, code_blocks):
+        submitted = time.perf_counter()
+        with self._lock:
+            if self.executor is None:
+                self.executor = self.pool.acquire()
+                self.kernel_wait_seconds = time.perf_counter() - submitted
+            result = self.executor.execute_code_blocks(code_blocks)
+            if self.first_cell_seconds is None:
+                finished = time.perf_counter()
+                self.first_cell_seconds = finished - submitted
+                self.first_cell_after = finished - self.created
+        return result
+
+    def restart(self) -> None:
+        if self.executor is not None:
+            self.executor.restart()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.pool.release(self.executor)
+            self.executor = None
+
+    def report(self) -> str:
+        if self.first_cell_seconds is None:
+            return "No cell was executed"
+        return (
+            f"Time to first executed cell: {self.first_cell_seconds:.2f}s "
+            f"({self.kernel_wait_seconds:.2f}s waiting for a kernel), "
+            f"{self.first_cell_after:.1f}s into the run. Kernels started: {self.pool.started}"
+        )
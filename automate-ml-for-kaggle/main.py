@@ -1,13 +1,23 @@
+import os
 import autogen
 from autogen import OpenAIWrapper
-from utils import is_ready_for_train, count_train_trials
+from utils import is_ready_for_train, readiness_stats, ConversationTracker
+from parallel_trials import trial_runner_reply
+from dataset_profile import profile_dataset, summarize_profile
+from dataset_store import prepare_dataset
+from kernel_pool import KernelPool, KernelSession
+from output_artifacts import ArtifactExecutor
 from pathlib import Path
-from autogen.coding.jupyter import LocalJupyterServer, JupyterCodeExecutor
+from autogen.coding.jupyter import LocalJupyterServer
 
 config_list = autogen.config_list_from_json(
     "OAI_CONFIG_LIST",
 )
 
+# Train the candidate models in parallel worker processes instead of one by one in the kernel
+PARALLEL_TRIALS = os.environ.get("PARALLEL_TRIALS", "false").lower() == "true"
+target_column = "SalePrice"
+
 llm_config = {
     "cache_seed": 42,  # change the cache_seed for different trials
     "temperature": 0,
@@ -25,12 +35,10 @@
     name="Data_Explorer",
     llm_config=llm_config,
     system_message="""You are the data explorer. Given a dataset and a task, please write code to explore and understand the properties of the dataset.
-For example, you can:
-- get the shape of the dataset
+Start by calling the `get_dataset_profile` tool on the dataset file: it gives the shape, dtypes, missing values, distributions, cardinality, correlations and target leakage hints at once, so don't write code for these.
+Only write code for exploration the profile doesn't cover, for example:
 - get the first several rows of the dataset
-- get the information of the dataset use `df.info()` or `df.describe()`
 - plot the plots as needed (i.e. histogram, distribution)
-- check the missing values
 Only perform necessary data exploration steps.
 
 If a data preprocessing step is performed, you only need to check whether the changes are good. Perform the exploration on the data as needed.
@@ -49,6 +57,7 @@
 4. Scale numerical variables
 5. other data preprocessing steps
 Please decide what data preprocessing steps are needed based on the data exploration results.
+If the dataset was only profiled and isn't loaded in the notebook yet, load it first.
 When transforming data, try not to use `inplace=True`, but instead assign the transformed data to a new variable.
 """,
 )
@@ -74,31 +83,17 @@
     llm_config=llm_config,
     system_message="""You are the code summarizer. Given a machine learning task and previous code snippets, please integrate all error-free code into a single code snippet.
 Please also provide a brief summary of the data exploration, data processing, and model training steps, and conclude what model is the best for the task.
+If the models were trained in parallel, use their leaderboard and specs to write the model training code and draw the conclusion.
 You should give the full code to reproduce the data exploration, data processing, and model training steps, and show the results with different metrics.
 """,
 )
 
-output_dir = Path("coding")
-output_dir.mkdir(exist_ok=True)
-server = LocalJupyterServer()
-code_executor = autogen.UserProxyAgent(
-    name="Code_Executor",
-    system_message="Executor. Execute the code written by the Coder and report the result.",
-    human_input_mode="NEVER",
-    code_execution_config={
-        "executor": JupyterCodeExecutor(server, output_dir=output_dir),
-    },
-)
-
-
 
-
-client = OpenAIWrapper(config_list=config_list)
+def dataset_profile(path: str) -> str:
+    return summarize_profile(profile_dataset(path, target_column))
 
 
 def state_transition(last_speaker, groupchat):
-    messages = groupchat.messages
-
     # init state
     if last_speaker is initializer:
         # init -> explore
@@ -109,10 +104,10 @@ def state_transition(last_speaker, groupchat):
         return code_executor
 
     elif last_speaker is code_executor:
-        last_second_speaker_name = groupchat.messages[-2]["name"]
+        last_second_speaker_name = tracker.previous_speaker
 
         # if we get an error, we repeat the current state
-        if "exitcode: 1" in messages[-1]["content"]:
+        if tracker.failed:
             return groupchat.agent_by_name(last_second_speaker_name)
 
         # explore state
@@ -121,55 +116,123 @@ def state_transition(last_speaker, groupchat):
 
         # process state
         elif last_second_speaker_name == "Data_Processer":
-            if is_ready_for_train(groupchat=groupchat, client=client):
-                return model_trainer
+            if is_ready_for_train(
+                groupchat=groupchat,
+                client=client,
+                executor=jupyter_executor,
+                target_column=target_column,
+            ):
+                return trial_runner if PARALLEL_TRIALS else model_trainer
             return data_explorer
 
         elif last_second_speaker_name == "Model_Trainer":
-            if count_train_trials(groupchat) < 2:
+            if tracker.train_trials < 2:
                 return model_trainer
             return summarizer
 
+    # parallel train state, back to processing if the prepared data couldn't be snapshotted
+    elif last_speaker is trial_runner:
+        if tracker.failed:
+            return data_processer
+        return summarizer
+
     # summarize state
     elif last_speaker is summarizer:
         return None  # end the conversation
 
 
-groupchat = autogen.GroupChat(
-    agents=[
-        initializer,
-        data_explorer,
-        data_processer,
-        model_trainer,
-        summarizer,
-        code_executor,
-    ],
-    messages=[],
-    max_round=20,
-    speaker_selection_method=state_transition,
-)
-manager = autogen.GroupChatManager(groupchat=groupchat, llm_config=None)
-
-
-task_prompt = """Please help me to build a model predict the sales price for each house.
+# Worker processes of the parallel trials import this module, so only run it as a script
+if __name__ == "__main__":
+    output_dir = Path("coding")
+    output_dir.mkdir(exist_ok=True)
+    server = LocalJupyterServer()
+    # Kernels started ahead with the common imports done, KERNEL_POOL_SIZE=0 starts one on the first cell
+    kernel_pool = KernelPool(
+        server, size=int(os.environ.get("KERNEL_POOL_SIZE", "1")), output_dir=output_dir
+    )
+    jupyter_executor = KernelSession(kernel_pool)
+    # Outputs over the token cap are saved under coding/artifacts, the chat gets a preview and the path
+    artifact_executor = ArtifactExecutor(
+        jupyter_executor,
+        output_dir / "artifacts",
+        max_tokens=int(os.environ.get("INLINE_OUTPUT_TOKENS", "500")),
+    )
+    code_executor = autogen.UserProxyAgent(
+        name="Code_Executor",
+        system_message="Executor. Execute the code written by the Coder and report the result.",
+        human_input_mode="NEVER",
+        code_execution_config={
+            "executor": artifact_executor,
+        },
+    )
+
+    autogen.register_function(
+        dataset_profile,
+        caller=data_explorer,
+        executor=code_executor,
+        name="get_dataset_profile",
+        description="Get the profile of a CSV dataset: shape, dtypes, null ratios, cardinality, quantiles, top values, correlations and target leakage hints.",
+    )
+
+    # Snapshots the prepared data from the kernel and trains all candidate models on it in parallel
+    trial_runner = autogen.UserProxyAgent(
+        name="Trial_Runner",
+        human_input_mode="NEVER",
+        code_execution_config=False,
+    )
+    trial_runner.register_reply(
+        [autogen.Agent, None],
+        trial_runner_reply(jupyter_executor, output_dir, target_column),
+    )
+
+    client = OpenAIWrapper(config_list=config_list)
+
+    groupchat = autogen.GroupChat(
+        agents=[
+            initializer,
+            data_explorer,
+            data_processer,
+            model_trainer,
+            summarizer,
+            code_executor,
+            trial_runner,
+        ],
+        messages=[],
+        max_round=20,
+        speaker_selection_method=state_transition,
+    )
+    # Follows the speakers, exit codes and training trials as messages come in
+    tracker = ConversationTracker().attach(groupchat)
+    manager = autogen.GroupChatManager(groupchat=groupchat, llm_config=None)
+
+    # Convert the CSV once to a memory-mappable Arrow file with compact dtypes, which the notebook loads
+    dataset_path = prepare_dataset("./house_prices_train.csv")
+
+    task_prompt = f"""Please help me to build a model predict the sales price for each house.
 - The dataset is downloaded to this location: `./house_prices_train.csv`.
+- It is also prepared at `{dataset_path}`, which loads much faster: `from dataset_store import load_dataset; df = load_dataset("{dataset_path}")`. Its text columns are pandas categoricals, convert them with `.astype(str)` before filling missing values with new labels.
+- Save processed DataFrames worth keeping with `from dataset_store import save_snapshot; save_snapshot(df, "<name>")`, a new version each time; `load_snapshot("<name>")` reloads the latest one after a kernel restart.
 - All code will be executed in a Jupyter notebook, where previous states are saved.
 """
 
-# Never use ensemble models | Use a neural network this time using pytorch
-
-# task_prompt = """Please help me to build a model to classify Iris setosa, Iris versicolor, and Iris virginica. 
-# - The dataset is downloaded to this location: `./iris.csv`.
-# - All code will be executed in a Jupyter notebook, where previous states are saved.
-# """
-
+    # Never use ensemble models | Use a neural network this time using pytorch
 
-chat_result = initializer.initiate_chat(manager, message=task_prompt)
+    # task_prompt = """Please help me to build a model to classify Iris setosa, Iris versicolor, and Iris virginica.
+    # - The dataset is downloaded to this location: `./iris.csv`.
+    # - All code will be executed in a Jupyter notebook, where previous states are saved.
+    # """
 
+    chat_result = initializer.initiate_chat(manager, message=task_prompt)
+    print(readiness_stats.report())
+    print(jupyter_executor.report())
+    print(artifact_executor.report())
+    # The pool is closed first, so the session's kernel is stopped rather than restarted and warmed again
+    kernel_pool.close()
+    jupyter_executor.close()
 
-if "```python" in chat_result.chat_history[-1]["content"]:
+    if "```python" in chat_result.chat_history[-1]["content"]:
 
-    content = chat_result.chat_history[-1]["content"]
-    content = content.split("```python")[1].split("```")[0].strip()
-    with open("train_file_by_agent.py", "w") as f:
-        f.write(content)
+        content = chat_result.chat_history[-1]["content"]
+        content = content.split("```python")[1].split("```")[0].strip()
+        with open("train_file_by_agent.py", "w") as f:
+            f.write(content)
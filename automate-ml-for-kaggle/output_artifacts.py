@@ -0,0 +1,75 @@
+import os
+import threading
+from pathlib import Path
+
+# Lines pointing to files the executor saved, kept inline whatever the length of the output
+ARTIFACT_MARKERS = ("Image data saved to", "HTML data saved to")
+
+
+class ArtifactExecutor:
+    """Wraps a code executor so that long outputs don't go into the chat in full.
+
+    An output over `max_tokens` (about 4 characters per token) is saved to a numbered file in
+    `directory`, and the chat gets its beginning and end within the budget, the lines pointing to saved
+    images and tables, and the path of the full output.
+    """
+
+    def __init__(self, executor, directory: Path, max_tokens: int = 500):
+        self.executor = executor
+        self.directory = Path(directory)
+        self.max_tokens = max_tokens
+        self.cells = 0
+        self.offloaded = 0
+        self.tokens_offloaded = 0
+        self._lock = threading.Lock()
+
+    @property
+    def code_extractor(self):
+        return self.executor.code_extractor
+
+    def restart(self) -> None:
+        self.executor.restart()
+
+    def execute_code_blocks(self, code_blocks):
+        result = self.executor.execute_code_blocks(code_blocks)
+        with self._lock:
+            self.cells += 1
+            cell = self.cells
+        result.output = self.shorten(result.output, cell)
+        return result
+
+    def shorten(self, output: str, cell: int) -> str:
+        tokens = len(output) // 4
+        if tokens <= self.max_tokens:
+            return output
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"cell_{cell:03d}.txt"
+        path.write_text(output)
+
+        lines = output.splitlines()
+        artifacts = [line for line in lines if line.startswith(ARTIFACT_MARKERS)]
+        budget = max(self.max_tokens * 4 - sum(len(line) for line in artifacts), 0)
+        # Most of the budget for the beginning, the rest for the end, where errors are
+        head = output[: budget * 2 // 3].rsplit("\n", 1)[0]
+        tail = output[len(output) - budget // 3 :].split("\n", 1)[-1]
+        omitted = len(output) - len(head) - len(tail)
+
+        with self._lock:
+            self.offloaded += 1
+            self.tokens_offloaded += omitted // 4
+        return "\n".join(
+            [
+                head,
+                f"... [{omitted // 4} tokens omitted, the full output of {tokens} tokens is saved to "
+                f"{os.fspath(path)}; read only the parts you need from it] ...",
+                tail,
+            ]
+            + [line for line in artifacts if line not in head and line not in tail]
+        )
+
+    def report(self) -> str:
+        return (
+            f"Outputs offloaded to {self.directory}: {self.offloaded} of {self.cells} cells, "
+            f"about {self.tokens_offloaded} tokens kept out of the chat"
+        )
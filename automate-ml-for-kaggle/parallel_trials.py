@@ -0,0 +1,247 @@
+import importlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from autogen.coding import CodeBlock
+
+from dataset_store import read_arrow
+
+# Candidate models tried in parallel, as importable estimator classes and their parameters
+DEFAULT_CANDIDATES = [
+    {"name": "LinearRegression", "model": "sklearn.linear_model.LinearRegression"},
+    {"name": "Ridge", "model": "sklearn.linear_model.Ridge", "params": {"alpha": 10.0}},
+    {
+        "name": "Lasso",
+        "model": "sklearn.linear_model.Lasso",
+        "params": {"alpha": 100.0, "max_iter": 10000},
+    },
+    {
+        "name": "RandomForest",
+        "model": "sklearn.ensemble.RandomForestRegressor",
+        "params": {"n_estimators": 300, "random_state": 42},
+    },
+    {
+        "name": "GradientBoosting",
+        "model": "sklearn.ensemble.GradientBoostingRegressor",
+        "params": {
+            "n_estimators": 300,
+            "learning_rate": 0.05,
+            "max_depth": 3,
+            "random_state": 42,
+        },
+    },
+    {
+        "name": "XGBoost",
+        "model": "xgboost.XGBRegressor",
+        "params": {
+            "n_estimators": 500,
+            "learning_rate": 0.05,
+            "max_depth": 4,
+            "n_jobs": 1,
+            "random_state": 42,
+        },
+    },
+    {
+        "name": "LightGBM",
+        "model": "lightgbm.LGBMRegressor",
+        "params": {
+            "n_estimators": 500,
+            "learning_rate": 0.05,
+            "n_jobs": 1,
+            "verbose": -1,
+            "random_state": 42,
+        },
+    },
+]
+
+SPLIT_NAMES = ("X_train", "X_test", "y_train", "y_test")
+
+
+def snapshot_code(directory: str, target_column: str) -> str:
+    """Kernel code saving the prepared train/test split as Arrow files in `directory`.
+
+    The existing X_train, X_test, y_train and y_test are used if the kernel has them; otherwise the
+    most recently defined DataFrame with the target column is split 70/30, and the split is also
+    defined in the kernel so later cells reuse it.
+    """
+    return f"""
+import os as _os
+import pandas as _pd
+from dataset_store import write_arrow as _write_arrow
+_names = {SPLIT_NAMES!r}
+if not all(_name in globals() for _name in _names):
+    from sklearn.model_selection import train_test_split as _split
+    _frames = [_v for _k, _v in list(globals().items()) if not _k.startswith("_") and isinstance(_v, _pd.DataFrame) and {target_column!r} in _v.columns]
+    if not _frames:
+        raise ValueError("No prepared DataFrame with the {target_column} column in the kernel")
+    X_train, X_test, y_train, y_test = _split(_frames[-1].drop(columns=[{target_column!r}]), _frames[-1][{target_column!r}], test_size=0.3, random_state=42)
+for _name in _names:
+    _write_arrow(_pd.DataFrame(globals()[_name]), _os.path.join({directory!r}, _name + ".arrow"))
+print(f"Snapshot saved: {{len(X_train)}} train rows, {{len(X_test)}} test rows, {{X_train.shape[1]}} features")
+"""
+
+
+def snapshot_kernel(executor, directory: str, target_column: str) -> str:
+    """Save the kernel's prepared split to `directory` through its code executor, returning the output."""
+    result = executor.execute_code_blocks(
+        [CodeBlock(code=snapshot_code(directory, target_column), language="python")]
+    )
+    if result.exit_code != 0:
+        raise RuntimeError(f"Snapshot failed: {result.output}")
+    return result.output
+
+
+_split = None
+
+
+def _load_snapshot(directory: str) -> None:
+    # Each worker process memory-maps the snapshot once, for all the trials it runs. The workers
+    # share its pages through the OS cache instead of each holding a copy
+    global _split
+    _split = {
+        name: read_arrow(os.path.join(directory, f"{name}.arrow"))
+        for name in SPLIT_NAMES
+    }
+    for name in ("y_train", "y_test"):
+        _split[name] = _split[name].iloc[:, 0]
+
+
+def _is_classification(y) -> bool:
+    values = np.asarray(y)
+    return values.dtype.kind in "bOU" or (
+        values.dtype.kind in "iu" and len(np.unique(values)) <= 20
+    )
+
+
+def run_trial(spec: dict) -> dict:
+    """Fit one candidate on the snapshot's train split and evaluate it on the test split."""
+    from sklearn import metrics
+
+    started = time.perf_counter()
+    result = {
+        "name": spec["name"],
+        "model": spec["model"],
+        "params": spec.get("params", {}),
+    }
+    try:
+        module_name, class_name = spec["model"].rsplit(".", 1)
+        estimator = getattr(importlib.import_module(module_name), class_name)(
+            **spec.get("params", {})
+        )
+        estimator.fit(_split["X_train"], _split["y_train"])
+        predicted = estimator.predict(_split["X_test"])
+        y_test = _split["y_test"]
+        if _is_classification(y_test):
+            result["metrics"] = {
+                "accuracy": metrics.accuracy_score(y_test, predicted),
+                "f1_macro": metrics.f1_score(y_test, predicted, average="macro"),
+            }
+        else:
+            result["metrics"] = {
+                "rmse": float(np.sqrt(metrics.mean_squared_error(y_test, predicted))),
+                "mae": metrics.mean_absolute_error(y_test, predicted),
+                "r2": metrics.r2_score(y_test, predicted),
+            }
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def run_trials(
+    snapshot_dir: str, specs: list[dict], max_workers: int = None
+) -> list[dict]:
+    """Run every candidate in a pool of worker processes, best first."""
+    max_workers = max_workers or min(len(specs), os.cpu_count() or 1)
+    # Never forked from this process: its kernel pool, Jupyter and HTTP client threads could hold a
+    # lock at fork time that the child would wait on forever. Workers fork from a single-threaded server
+    # process that imports the main module, this one and the candidates' modules once for all of them,
+    # or are spawned where there is none
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(
+            ["__main__", __name__, "sklearn.metrics"]
+            + [spec["model"].rsplit(".", 1)[0] for spec in specs]
+        )
+    else:
+        context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=context,
+        initializer=_load_snapshot,
+        initargs=(snapshot_dir,),
+    ) as pool:
+        results = list(pool.map(run_trial, specs))
+
+    def rank(result):
+        if "error" in result:
+            return (1, 0.0)
+        scores = result["metrics"]
+        return (0, scores["rmse"] if "rmse" in scores else -scores["accuracy"])
+
+    return sorted(results, key=rank)
+
+
+def format_leaderboard(results: list[dict]) -> str:
+    metric_names = list(
+        dict.fromkeys(name for r in results for name in r.get("metrics", {}))
+    )
+    lines = [
+        "| Rank | Model | " + " | ".join(metric_names) + " | Seconds |",
+        "| --- | --- | " + " | ".join("---" for _ in metric_names) + " | --- |",
+    ]
+    for rank, result in enumerate(results, 1):
+        if "error" in result:
+            scores = ["error"] + [""] * (len(metric_names) - 1)
+        else:
+            scores = [f"{result['metrics'][name]:.4f}" for name in metric_names]
+        lines.append(
+            f"| {rank} | {result['name']} | "
+            + " | ".join(scores)
+            + f" | {result['seconds']:.1f} |"
+        )
+    errors = [f"- {r['name']}: {r['error']}" for r in results if "error" in r]
+    return "\n".join(lines + ([""] + errors if errors else []))
+
+
+def trial_runner_reply(
+    executor,
+    output_dir,
+    target_column: str,
+    specs: list[dict] = DEFAULT_CANDIDATES,
+    max_workers: int = None,
+):
+    """A reply function snapshotting the prepared data and answering with the trials' leaderboard."""
+
+    def reply(recipient, messages=None, sender=None, config=None):
+        snapshot_dir = os.path.join(output_dir, "snapshot")
+        try:
+            snapshot_output = snapshot_kernel(executor, snapshot_dir, target_column)
+        except RuntimeError as e:
+            return True, f"exitcode: 1 (execution failed)\n{e}"
+
+        started = time.perf_counter()
+        results = run_trials(snapshot_dir, specs, max_workers)
+        elapsed = time.perf_counter() - started
+        leaderboard = format_leaderboard(results)
+        with open(os.path.join(output_dir, "leaderboard.json"), "w") as file:
+            json.dump(results, file, indent=2)
+
+        trial_seconds = sum(result["seconds"] for result in results)
+        return True, (
+            f"exitcode: 0 (execution succeeded)\n{snapshot_output.strip()}\n"
+            f"{len(results)} models trained in parallel in {elapsed:.1f}s "
+            f"({trial_seconds:.1f}s if run one after another). Leaderboard on the test split:\n\n"
+            f"{leaderboard}\n\n"
+            "Each model was fit on X_train, y_train and evaluated on X_test, y_test with these specs:\n"
+            + "\n".join(
+                f"- {spec['name']}: {spec['model']}({spec.get('params', {})})"
+                for spec in specs
+            )
+        )
+
+    return reply
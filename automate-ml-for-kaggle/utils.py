@@ -1,19 +1,151 @@
-def is_ready_for_train(groupchat, client):
-    messages = (
-        [
-            {
-                "role": "system",
-                "content": """Based on the dataset exploration, and the data processing, please determine whether the data is ready for model training.
+import json
+import re
+
+from autogen.coding import CodeBlock
+
+READINESS_PROMPT = """Based on the dataset exploration, and the data processing, please determine whether the data is ready for model training.
 Please give a short summary of what we know about the dataset and what we have done so far.
 
 Please follow this format:
 Summary: <Your summary>
 Decision: <choose from "Ready for training" or "Need more processing">
-""",
+"""
+
+SPLIT_NAMES = ("X_train", "X_test", "y_train", "y_test")
+
+# Prints the nulls and non-numeric columns of every DataFrame in the kernel, in definition order.
+# The scan runs in a function that is deleted after, leaving no names or references in the notebook
+KERNEL_STATE_CODE = """
+def _kernel_state():
+    import json
+    import pandas as pd
+    state = {}
+    for name, value in list(globals().items()):
+        if not name.startswith("_") and isinstance(value, (pd.DataFrame, pd.Series)):
+            frame = value.to_frame() if isinstance(value, pd.Series) else value
+            state[name] = {
+                "series": isinstance(value, pd.Series),
+                "shape": list(frame.shape),
+                "columns": [str(c) for c in frame.columns],
+                "nulls": int(frame.isna().sum().sum()),
+                "non_numeric": [str(c) for c in frame.columns[[not pd.api.types.is_numeric_dtype(t) for t in frame.dtypes]]],
             }
+    print("KERNEL_STATE " + json.dumps(state))
+try:
+    _kernel_state()
+finally:
+    del _kernel_state
+"""
+
+
+class ReadinessStats:
+    """How often the readiness was decided from the kernel state, and the LLM tokens that saved."""
+
+    def __init__(self):
+        self.checks = 0
+        self.llm_calls = 0
+        self.tokens_saved = 0
+
+    def report(self) -> str:
+        return (
+            f"Readiness checks: {self.checks}, LLM calls: {self.llm_calls} "
+            f"({self.checks - self.llm_calls} saved), about {self.tokens_saved} prompt tokens saved"
+        )
+
+
+readiness_stats = ReadinessStats()
+
+
+def estimate_tokens(messages) -> int:
+    # About 4 characters per token
+    return sum(len(str(message.get("content") or "")) for message in messages) // 4
+
+
+def kernel_state(executor):
+    """The DataFrames and Series defined in the Jupyter kernel, or None if it can't be inspected."""
+    try:
+        result = executor.execute_code_blocks(
+            [CodeBlock(code=KERNEL_STATE_CODE, language="python")]
+        )
+    except Exception:
+        return None
+    if result.exit_code != 0 or "KERNEL_STATE " not in result.output:
+        return None
+    return json.loads(result.output.split("KERNEL_STATE ", 1)[1].splitlines()[0])
+
+
+def rule_based_readiness(state, target_column):
+    """Ready if the train/test split, X and y, or else the latest DataFrame with the target column are
+    numeric and complete.
+
+    Returns None when the kernel has none of them, to let the LLM decide.
+    """
+    if all(name in state for name in SPLIT_NAMES):
+        frames = [state[name] for name in SPLIT_NAMES]
+    elif "X" in state and "y" in state:
+        frames = [state["X"], state["y"]]
+    else:
+        with_target = [
+            frame
+            for frame in state.values()
+            if not frame["series"] and target_column in frame["columns"]
         ]
-        + groupchat.messages
+        if not with_target:
+            return None
+        frames = with_target[-1:]
+
+    problems = [
+        f"{frame['nulls']} missing values" for frame in frames if frame["nulls"]
+    ] + [
+        f"non-numeric columns {frame['non_numeric'][:10]}"
+        for frame in frames
+        if frame["non_numeric"]
+    ]
+    print("-" * 50)
+    print(
+        "Decision: "
+        + (
+            "Need more processing (" + "; ".join(problems) + ")"
+            if problems
+            else "Ready for training"
+        )
     )
+    print("-" * 50)
+    return not problems
+
+
+def is_ready_for_train(
+    groupchat,
+    client,
+    executor=None,
+    target_column=None,
+    window: int = 6,
+    stats: ReadinessStats = readiness_stats,
+):
+    """Decide from the kernel state through `executor` if possible, else ask the LLM.
+
+    The LLM only sees the task and the last `window` messages instead of the whole conversation.
+    """
+    full_prompt = [{"role": "system", "content": READINESS_PROMPT}] + groupchat.messages
+    stats.checks += 1
+    if executor is not None:
+        state = kernel_state(executor)
+        ready = None if state is None else rule_based_readiness(state, target_column)
+        if ready is not None:
+            stats.tokens_saved += estimate_tokens(full_prompt)
+            return ready
+
+    recent = groupchat.messages[1:][-window:]
+    # A tool response can't come without the tool call before it
+    while recent and recent[0].get("role") == "tool":
+        recent = recent[1:]
+    messages = (
+        [{"role": "system", "content": READINESS_PROMPT}]
+        + groupchat.messages[:1]
+        + recent
+    )
+    stats.llm_calls += 1
+    stats.tokens_saved += estimate_tokens(full_prompt) - estimate_tokens(messages)
 
     response = client.create(messages=messages)
     response_str = client.extract_text_or_completion_object(response)[0]
@@ -27,18 +159,52 @@ def is_ready_for_train(groupchat, client):
     return False
 
 
-def count_train_trials(groupchat):
-    messages = groupchat.messages
+class ConversationTracker:
+    """The workflow state of a GroupChat, updated as each message is appended.
+
+    Keeps the last two speakers, the exit code of the last message and the number of training
+    trials (Model_Trainer turns whose code didn't fail), so speaker selection doesn't rescan the
+    history. Exit codes are read from the `exitcode: <n>` line code executors start their replies
+    with; messages without one have no exit code.
+    """
+
+    EXIT_CODE = re.compile(r"exitcode: (-?\d+)")
+
+    def __init__(self):
+        self.last_speaker = None
+        self.previous_speaker = None
+        self.exit_code = None
+        self.train_trials = 0
+        self.seen = 0
+
+    @property
+    def failed(self) -> bool:
+        return self.exit_code not in (None, 0)
+
+    def update(self, message: dict) -> None:
+        self.previous_speaker, self.last_speaker = self.last_speaker, message.get(
+            "name"
+        )
+        match = self.EXIT_CODE.match(str(message.get("content") or ""))
+        self.exit_code = int(match.group(1)) if match else None
+        if self.last_speaker == "Model_Trainer":
+            self.train_trials += 1
+        elif self.previous_speaker == "Model_Trainer" and self.failed:
+            self.train_trials -= 1
+
+    def attach(self, groupchat) -> "ConversationTracker":
+        """Update on every message appended to `groupchat`, including those already in it."""
+        append = groupchat.append
+
+        def tracked_append(message, speaker):
+            append(message, speaker)
+            self.sync(groupchat.messages)
 
-    tcount = 0
-    for i, message in enumerate(messages):
-        if message["name"] == "Model_Trainer":
-            tcount += 1
-        elif (
-            message["name"] == "Code_Executor"
-            and "exitcode: 1" in message["content"]
-            and messages[i - 1]["name"] == "Model_Trainer"
-        ):
-            tcount -= 1
+        groupchat.append = tracked_append
+        self.sync(groupchat.messages)
+        return self
 
-    return tcount
+    def sync(self, messages: list) -> None:
+        for message in messages[self.seen :]:
+            self.update(message)
+        self.seen = len(messages)
@@ -0,0 +1,89 @@
+from html.parser import HTMLParser
+from typing import Iterable
+
+# Subtrees that never hold article text
+SKIP_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+    "form",
+}
+
+CHUNK_SIZE = 16 * 1024
+
+
+class ArticleTextParser(HTMLParser):
+    """Collects the text of <p> elements outside SKIP_TAGS, until `limit` characters are collected."""
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.paragraphs = []
+        self.length = 0
+        self.done = False
+        self._paragraph = None
+        self._skip_depth = 0
+
+    def _end_paragraph(self) -> None:
+        text = "".join(self._paragraph)
+        self._paragraph = None
+        self.paragraphs.append(text)
+        self.length += len(text) + 1
+        if self.length >= self.limit:
+            self.done = True
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "p" and not self._skip_depth:
+            # A <p> implicitly closes an unclosed one
+            if self._paragraph is not None:
+                self._end_paragraph()
+            self._paragraph = []
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "p" and self._paragraph is not None:
+            self._end_paragraph()
+
+    def handle_data(self, data):
+        if self._paragraph is not None and not self._skip_depth and not self.done:
+            self._paragraph.append(data)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.paragraphs)
+
+
+def extract_paragraphs(chunks: Iterable[str], limit: int) -> str:
+    """The text of the article's paragraphs, up to `limit` characters.
+
+    The HTML is parsed as it arrives, and reading stops once enough text has been collected, so the
+    rest of the page is neither downloaded nor parsed.
+    """
+    parser = ArticleTextParser(limit)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+        if parser._paragraph is not None:
+            parser._end_paragraph()
+    return parser.text[:limit]
+
+
+def iter_chunks(html: str, chunk_size: int = CHUNK_SIZE) -> Iterable[str]:
+    for start in range(0, len(html), chunk_size):
+        yield html[start : start + chunk_size]
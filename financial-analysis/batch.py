@@ -0,0 +1,135 @@
+"""Analyze a watchlist of stocks, writing one report per ticker and an index.
+
+Usage:
+    python batch.py AAPL MSFT NVDA [--output-dir reports] [--max-in-flight 8]
+    python batch.py --watchlist watchlist.txt
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import news_fetcher
+from concurrency_limit import ConcurrencyLimit, limit_llm_calls, limit_session
+from main import analyze_stock, create_agents
+from price_analytics import price_source
+from price_sources import HISTORY_DAYS
+
+
+def read_watchlist(path: str) -> list[str]:
+    """One ticker per line, ignoring blank lines and # comments."""
+    with open(path) as file:
+        lines = [line.split("#")[0].strip() for line in file]
+    return [line.upper() for line in lines if line]
+
+
+async def analyze_ticker(ticker: str, output_dir: str, limit: ConcurrencyLimit) -> dict:
+    work_dir = os.path.join(output_dir, ticker)
+    agents = create_agents(work_dir)
+    for agent in agents.values():
+        limit_llm_calls(agent, limit)
+
+    started = time.perf_counter()
+    report_path = os.path.join(output_dir, f"{ticker}.md")
+    try:
+        await analyze_stock(ticker, agents, report_path, work_dir, echo=False)
+        if not os.path.exists(report_path) or not os.path.getsize(report_path):
+            raise RuntimeError("no report was written")
+        status = "done"
+    except Exception as e:
+        status = f"failed: {e}"
+        report_path = None
+    return {
+        "ticker": ticker,
+        "status": status,
+        "seconds": time.perf_counter() - started,
+        "report": report_path,
+    }
+
+
+def write_index(results: list[dict], output_dir: str, elapsed: float) -> str:
+    done = sum(result["status"] == "done" for result in results)
+    lines = [
+        "# Market analysis reports",
+        "",
+        f"{done} of {len(results)} tickers analyzed in {elapsed / 60:.1f} minutes "
+        f"({done / elapsed * 60:.1f} tickers per minute).",
+        "",
+        "| Ticker | Status | Seconds | Report |",
+        "| --- | --- | --- | --- |",
+    ]
+    for result in results:
+        report = (
+            f"[{result['ticker']}.md]({result['ticker']}.md)"
+            if result["report"]
+            else ""
+        )
+        status = result["status"].replace("|", "\\|").replace("\n", " ")
+        lines.append(
+            f"| {result['ticker']} | {status} | {result['seconds']:.0f} | {report} |"
+        )
+    path = os.path.join(output_dir, "index.md")
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+async def run_batch(
+    tickers: list[str], output_dir: str = "reports", max_in_flight: int = 8
+) -> list[dict]:
+    """Analyze all tickers concurrently, with at most max_in_flight LLM and HTTP calls at a time."""
+    os.makedirs(output_dir, exist_ok=True)
+    tickers = list(dict.fromkeys(tickers))
+    limit = ConcurrencyLimit(max_in_flight)
+    limit_session(news_fetcher.session, limit, pool_maxsize=max_in_flight)
+
+    # Blocking LLM calls run in the default executor, which must have room for those waiting for a slot
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max(32, 2 * max_in_flight))
+    )
+
+    started = time.perf_counter()
+    # Download the price history of all tickers together, the price tool then reads it from memory
+    end = pd.Timestamp.today().normalize()
+    await asyncio.to_thread(
+        price_source.history, tickers, end - pd.Timedelta(days=HISTORY_DAYS), end
+    )
+
+    results = await asyncio.gather(
+        *(analyze_ticker(ticker, output_dir, limit) for ticker in tickers)
+    )
+    elapsed = time.perf_counter() - started
+
+    index_path = write_index(results, output_dir, elapsed)
+    done = sum(result["status"] == "done" for result in results)
+    print(
+        f"{done}/{len(results)} tickers in {elapsed:.0f}s, {done / elapsed * 60:.1f} tickers per minute "
+        f"(peak {limit.peak} calls in flight). Index: {index_path}"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="*")
+    parser.add_argument("--watchlist", help="File with one ticker per line")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=8,
+        help="Maximum LLM and HTTP calls in flight across all tickers",
+    )
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.watchlist:
+        tickers += read_watchlist(args.watchlist)
+    if not tickers:
+        parser.error("give tickers or a --watchlist")
+
+    asyncio.run(run_batch(tickers, args.output_dir, args.max_in_flight))
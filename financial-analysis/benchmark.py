@@ -0,0 +1,431 @@
+"""Benchmarks for the financial analysis tools, against a local fixture server instead of Yahoo Finance.
+
+Usage:
+    python benchmark.py news-digest [--articles 10] [--latency-ms 150]
+    python benchmark.py http-cache [--articles 10] [--latency-ms 150]
+    python benchmark.py extractor [--pages saved_pages_dir]
+    python benchmark.py summarizer [--articles 5] [--token-budget 1500]
+    python benchmark.py price-store [--tickers 50]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+import news_fetcher
+from article_extractor import extract_paragraphs, iter_chunks
+from http_cache import HttpCache
+from news_fetcher import (
+    ARTICLE_TEXT_LIMIT,
+    create_session,
+    extract_article_text,
+    fetch_article,
+    get_news_digest,
+    get_news_items,
+)
+from news_summarizer import estimate_tokens, split_sentences, summarize_articles
+from price_analytics import get_price_changes
+from price_sources import HISTORY_DAYS, PriceSource
+from price_store import PriceStore
+
+WORDS = """market shares revenue quarter growth investors analysts earnings guidance stock price
+company demand margin outlook forecast sales profit dividend valuation rally decline""".split()
+
+
+def synthetic_sentence(rng: random.Random, ticker: str = "AAPL") -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    if rng.random() < 0.2:
+        words.insert(rng.randrange(len(words)), ticker)
+    return " ".join(words)[0].upper() + " ".join(words)[1:] + "."
+
+
+def synthetic_article(index: int, paragraphs: int = 40, seed: int = 0) -> str:
+    """An article page padded like a real news site, with scripts, styles and navigation."""
+    rng = random.Random(seed + index)
+    text = [
+        " ".join(synthetic_sentence(rng) for _ in range(rng.randint(3, 5)))
+        for _ in range(paragraphs)
+    ]
+    script = "var config = " + json.dumps({"k": "x" * 20000}) + ";"
+    return (
+        f"<html><head><title>Article {index}</title><style>p {{margin: 0}}</style>"
+        f"<script>{script}</script></head><body>"
+        + "<nav><ul>"
+        + "".join(f"<li><a href='/s{i}'><p>Section {i}</p></a></li>" for i in range(50))
+        + "</ul></nav><article>"
+        + f"<h1>Article {index}</h1>"
+        + "".join(f"<p>{paragraph}</p>" for paragraph in text)
+        + "</article><footer><p>Copyright</p></footer>"
+        + f"<script>{script}</script></body></html>"
+    )
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients close article connections early once they have read enough text
+        pass
+
+
+class FixtureServer:
+    """Serves the Yahoo Finance news stream, the article metadata and the articles on localhost."""
+
+    def __init__(self, articles: int, latency_ms: float):
+        self.pages = {
+            f"/articles/{index}": synthetic_article(index) for index in range(articles)
+        }
+        self.latency = latency_ms / 1000
+        # Fixed for the server's lifetime, so the article metadata keeps its ETag
+        self.published = datetime.now(timezone.utc).replace(microsecond=0)
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body: str, content_type: str) -> None:
+                time.sleep(fixture.latency)
+                data = body.encode()
+                etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                uuids = ",".join(
+                    f"uuid{index}:STORY" for index in range(len(fixture.pages))
+                )
+                pagination = {"pagination": {"uuids": uuids}}
+                body = {
+                    "g0": {
+                        "data": {
+                            "stream_pagination": {
+                                "gqlVariables": {"tickerStream": pagination}
+                            }
+                        }
+                    }
+                }
+                self._send(json.dumps(body), "application/json")
+
+            def do_GET(self):
+                if self.path.startswith("/caas/content/article/"):
+                    items = [
+                        {
+                            "data": {
+                                "partnerData": {
+                                    "finalUrl": f"{fixture.url}{path}",
+                                    "modifiedDate": (
+                                        fixture.published - timedelta(hours=index)
+                                    ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                    "pageTitle": f"Article {index}",
+                                }
+                            }
+                        }
+                        for index, path in enumerate(fixture.pages)
+                    ]
+                    self._send(json.dumps({"items": items}), "application/json")
+                elif self.path in fixture.pages:
+                    self._send(fixture.pages[self.path], "text/html")
+                else:
+                    self.send_error(404)
+
+        self.server = _QuietServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self) -> "FixtureServer":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def benchmark_news_digest(articles: int, latency_ms: float, repeats: int) -> None:
+    with FixtureServer(articles, latency_ms) as fixture:
+        news_fetcher.YAHOO_FINANCE_URL = fixture.url
+
+        def one_by_one() -> str:
+            news_fetcher.http_cache = HttpCache(":memory:")
+            # The previous flow: a new connection per request, one summarize_news call per article
+            news = get_news_items("AAPL", articles, session=requests)
+            return "\n\n".join(
+                fetch_article(item["url"], session=requests) for item in news
+            )
+
+        def digest() -> str:
+            news_fetcher.http_cache = HttpCache(":memory:")
+            return get_news_digest("AAPL", articles, session=create_session())
+
+        print(
+            f"{articles} articles, {latency_ms:.0f}ms server latency, {repeats} repeats\n"
+            f"{'mode':>12} {'p50 ms':>9} {'max ms':>9} {'tool calls':>11}"
+        )
+        for name, run, tool_calls in (
+            ("one-by-one", one_by_one, 1 + articles),
+            ("digest", digest, 1),
+        ):
+            runtimes = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                output = run()
+                runtimes.append((time.perf_counter() - started) * 1000)
+            assert "Error" not in output, output
+            print(
+                f"{name:>12} {statistics.median(runtimes):>9.1f} {max(runtimes):>9.1f} {tool_calls:>11}"
+            )
+
+
+def benchmark_http_cache(articles: int, latency_ms: float, repeats: int) -> None:
+    with FixtureServer(articles, latency_ms) as fixture:
+        news_fetcher.YAHOO_FINANCE_URL = fixture.url
+        cache = news_fetcher.http_cache = HttpCache(":memory:")
+
+        print(
+            f"{articles} articles, {latency_ms:.0f}ms server latency\n"
+            f"{'run':>6} {'ms':>9} {'hit rate':>9} {'kB saved':>9}"
+        )
+        for run in range(1 + repeats):
+            before = cache.stats()
+            started = time.perf_counter()
+            output = get_news_digest("AAPL", articles, session=create_session())
+            runtime = (time.perf_counter() - started) * 1000
+            assert "Error" not in output, output
+            after = cache.stats()
+            hits = after["hits"] - before["hits"]
+            lookups = hits + after["misses"] - before["misses"]
+            print(
+                f"{'cold' if run == 0 else 'warm':>6} {runtime:>9.1f} {hits / lookups:>9.0%} "
+                f"{(after['bytes_saved'] - before['bytes_saved']) / 1024:>9.1f}"
+            )
+
+
+def soup_extract(html: str, limit: int) -> str:
+    """The previous extraction: parse the whole page and join every <p>."""
+    soup = BeautifulSoup(html, "html.parser")
+    return "\n".join([p.get_text() for p in soup.find_all("p")])[:limit]
+
+
+def benchmark_extractor(pages_dir: str, limit: int, repeats: int) -> None:
+    if pages_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.htm*"))):
+            with open(path, encoding="utf-8", errors="replace") as file:
+                pages.append(file.read())
+    else:
+        pages = [synthetic_article(index, paragraphs=300) for index in range(20)]
+    megabytes = sum(len(page) for page in pages) / 1e6
+
+    print(
+        f"{len(pages)} pages, {megabytes:.1f} MB, {limit} characters kept\n"
+        f"{'extractor':>10} {'MB/s':>9} {'pages/s':>9} {'peak kB':>9}"
+    )
+    for name, extract in (
+        ("soup", soup_extract),
+        ("streaming", lambda html, n: extract_paragraphs(iter_chunks(html), n)),
+    ):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            for page in pages:
+                extract(page, limit)
+        runtime = time.perf_counter() - started
+
+        peak = 0
+        for page in pages:
+            tracemalloc.start()
+            extract(page, limit)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print(
+            f"{name:>10} {megabytes * repeats / runtime:>9.1f} "
+            f"{len(pages) * repeats / runtime:>9.1f} {peak / 1024:>9.1f}"
+        )
+
+
+def benchmark_summarizer(
+    articles: int, token_budget: Optional[int], summary_length: int
+) -> None:
+    texts = [
+        extract_article_text(synthetic_article(index), ARTICLE_TEXT_LIMIT)
+        for index in range(articles)
+    ]
+    ticker_sentences = sum(
+        "AAPL" in sentence for text in texts for sentence in split_sentences(text)
+    )
+    truncated = [text[:summary_length] for text in texts]
+    if token_budget is None:
+        token_budget = sum(estimate_tokens(text) for text in truncated)
+
+    started = time.perf_counter()
+    summaries = summarize_articles(
+        [{"title": f"AAPL article {i}", "text": text} for i, text in enumerate(texts)],
+        "AAPL",
+        token_budget,
+    )
+    runtime = (time.perf_counter() - started) * 1000
+
+    summarized = [" ".join(sentences) for sentences in summaries]
+    print(
+        f"{articles} articles, {sum(estimate_tokens(text) for text in texts)} tokens of text, "
+        f"{ticker_sentences} sentences mentioning the ticker\n"
+        f"{'digest':>11} {'tokens':>7} {'ticker sentences':>17} {'ms':>7}"
+    )
+    for name, digest, ms in (
+        (f"first {summary_length}", truncated, 0.0),
+        ("summarized", summarized, runtime),
+    ):
+        mentions = sum(text.count("AAPL") for text in digest)
+        tokens = sum(estimate_tokens(text) for text in digest)
+        print(f"{name:>11} {tokens:>7} {mentions:>17} {ms:>7.1f}")
+
+
+class SyntheticPriceSource(PriceSource):
+    """Random walks on business days, with a simulated network latency per download."""
+
+    def __init__(self, latency_ms: float):
+        super().__init__()
+        self.latency = latency_ms / 1000
+        self.downloads = 0
+        self.rows = 0
+
+    def download(self, tickers, start, end):
+        time.sleep(self.latency)
+        self.downloads += 1
+        dates = pd.bdate_range(start, end)
+        frames = {}
+        for ticker in tickers:
+            rng = np.random.default_rng(sum(map(ord, ticker)))
+            days = pd.bdate_range(end - pd.Timedelta(days=3 * HISTORY_DAYS), end)
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+            frame = pd.DataFrame(
+                {"Open": close, "High": close, "Low": close, "Close": close},
+                index=days,
+            )
+            frame["Volume"] = 1e6
+            frames[ticker] = (
+                frame.loc[dates[0] : dates[-1]] if len(dates) else frame[:0]
+            )
+            self.rows += len(frames[ticker])
+        return frames
+
+
+def benchmark_price_store(tickers: int, latency_ms: float) -> None:
+    symbols = [f"T{index:03d}" for index in range(tickers)]
+    directory = tempfile.mkdtemp()
+    try:
+        day = pd.Timestamp("2025-06-02")
+        print(
+            f"{tickers} tickers, {latency_ms:.0f}ms per download\n"
+            f"{'run':>22} {'downloads':>10} {'rows':>7} {'ms':>8}"
+        )
+        for name, end, store in (
+            ("no store, every run", day, None),
+            ("store, first run", day, True),
+            ("store, same day", day, True),
+            ("store, next day", day + pd.offsets.BDay(1), True),
+        ):
+            source = SyntheticPriceSource(latency_ms)
+            if store:
+                source = PriceStore(source, directory)
+            started = time.perf_counter()
+            history = source.history(
+                symbols, end - pd.Timedelta(days=HISTORY_DAYS), end
+            )
+            for ticker in symbols:
+                get_price_changes(ticker, chart_path=None, source=source, as_of=end)
+            runtime = (time.perf_counter() - started) * 1000
+            upstream = source.source if store else source
+            assert len(history) == tickers
+            print(
+                f"{name:>22} {upstream.downloads:>10} {upstream.rows:>7} {runtime:>8.1f}"
+            )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    digest_parser = subparsers.add_parser(
+        "news-digest",
+        help="Sequential article fetches versus the concurrent news digest",
+    )
+    digest_parser.add_argument("--articles", type=int, default=10)
+    digest_parser.add_argument("--latency-ms", type=float, default=150)
+    digest_parser.add_argument("--repeats", type=int, default=5)
+
+    cache_parser = subparsers.add_parser(
+        "http-cache", help="News digest with a cold and a warm HTTP cache"
+    )
+    cache_parser.add_argument("--articles", type=int, default=10)
+    cache_parser.add_argument("--latency-ms", type=float, default=150)
+    cache_parser.add_argument("--repeats", type=int, default=2)
+
+    extractor_parser = subparsers.add_parser(
+        "extractor", help="Whole-page BeautifulSoup versus the streaming extractor"
+    )
+    extractor_parser.add_argument(
+        "--pages", default="", help="Directory of saved .html pages, synthetic if unset"
+    )
+    extractor_parser.add_argument("--limit", type=int, default=1000)
+    extractor_parser.add_argument("--repeats", type=int, default=5)
+
+    summarizer_parser = subparsers.add_parser(
+        "summarizer", help="Truncated articles versus the extractive summary"
+    )
+    summarizer_parser.add_argument("--articles", type=int, default=5)
+    summarizer_parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Defaults to the tokens of the truncated digest",
+    )
+    summarizer_parser.add_argument("--summary-length", type=int, default=1000)
+
+    store_parser = subparsers.add_parser(
+        "price-store", help="Price downloads with and without the local price store"
+    )
+    store_parser.add_argument("--tickers", type=int, default=50)
+    store_parser.add_argument("--latency-ms", type=float, default=300)
+
+    args = parser.parse_args()
+    if args.benchmark == "news-digest":
+        benchmark_news_digest(args.articles, args.latency_ms, args.repeats)
+    elif args.benchmark == "http-cache":
+        benchmark_http_cache(args.articles, args.latency_ms, args.repeats)
+    elif args.benchmark == "extractor":
+        benchmark_extractor(args.pages, args.limit, args.repeats)
+    elif args.benchmark == "summarizer":
+        benchmark_summarizer(args.articles, args.token_budget, args.summary_length)
+    elif args.benchmark == "price-store":
+        benchmark_price_store(args.tickers, args.latency_ms)
@@ -0,0 +1,62 @@
+import functools
+import threading
+
+from requests.adapters import HTTPAdapter
+
+
+class ConcurrencyLimit:
+    """Caps the number of calls in flight across all threads, and records the peak reached."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ConcurrencyLimit":
+        self._semaphore.acquire()
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        return self
+
+    def __exit__(self, *args) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    def wrap(self, function):
+        @functools.wraps(function)
+        def limited(*args, **kwargs):
+            with self:
+                return function(*args, **kwargs)
+
+        return limited
+
+
+class LimitedHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter that holds a slot of the limit while sending a request and reading its headers."""
+
+    def __init__(self, limit: ConcurrencyLimit, **kwargs):
+        self.limit = limit
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        with self.limit:
+            return super().send(request, **kwargs)
+
+
+def limit_session(session, limit: ConcurrencyLimit, pool_maxsize: int = 10) -> None:
+    """Make every request of a requests session count against the limit."""
+    adapter = LimitedHTTPAdapter(
+        limit, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def limit_llm_calls(agent, limit: ConcurrencyLimit) -> None:
+    """Make every LLM completion of an agent, including chat summaries, count against the limit."""
+    if getattr(agent, "client", None) is not None:
+        agent.client.create = limit.wrap(agent.client.create)
@@ -0,0 +1,107 @@
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class HttpCache:
+    """On-disk cache of processed HTTP responses, with the validators to revalidate them.
+
+    Each entry keeps the content extracted from a response (e.g. an article's text, not its HTML)
+    together with its ETag and Last-Modified headers, so a later request can be made conditional
+    and a 304 Not Modified answered from the cache. `bytes_saved` counts the response bodies that
+    did not have to be downloaded again. Responses without validators can't be revalidated, so they
+    are only reused for `ttl_seconds` (see `get`).
+    """
+
+    def __init__(
+        self,
+        path: str = ".http_cache.sqlite",
+        max_entries: int = 5000,
+        ttl_seconds: float = 15 * 60,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "size INTEGER NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """Return the cached entry, with its content, validators, size and stored_at time.
+
+        With `max_age`, an entry stored more than max_age seconds ago is treated as missing.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, etag, last_modified, size, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None or (max_age is not None and time.time() - row[4] >= max_age):
+            return None
+        return dict(zip(("content", "etag", "last_modified", "size", "stored_at"), row))
+
+    def set(
+        self,
+        key: str,
+        content: str,
+        size: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, etag, last_modified, size, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, content, etag, last_modified, size, time.time()),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY stored_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        """Restart the age of an entry that was revalidated."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+
+    def conditional_headers(self, entry: Optional[dict]) -> dict:
+        """If-None-Match and If-Modified-Since headers to revalidate an entry."""
+        headers = {}
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, hit: bool, bytes_saved: int = 0) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += bytes_saved
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
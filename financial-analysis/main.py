@@ -1,11 +1,18 @@
-import autogen
-import re
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
-import requests
-from bs4 import BeautifulSoup
-import textwrap
+import asyncio
+import os
 
-requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+import autogen
+from autogen.io import IOStream
+
+from news_fetcher import (
+    DIGEST_TOKEN_BUDGET,
+    fetch_article,
+    get_news_digest,
+    get_news_items,
+    http_cache,
+)
+from price_analytics import get_price_changes
+from report_stream import MarkdownReportWriter, ReportStream
 
 config_list = autogen.config_list_from_json(
     "OAI_CONFIG_LIST",
@@ -15,100 +22,91 @@
 )
 
 
-# code retrieved from https://stackoverflow.com/questions/79019497/retrieving-news-articles-from-yahoo-finance-canada-website
-def getUuids(companyName):
-    url = "https://ca.finance.yahoo.com/_finance_doubledown/api/resource?bkt=finance-CA-en-CA-def&device=desktop&ecma=modern"
-    data = {
-        "requests": {
-            "g0": {
-                "resource": "StreamService",
-                "operation": "read",
-                "params": {
-                    "forceJpg": True,
-                    "releasesParams": {"limit": 50, "offset": 0},
-                    "ncpParams": {
-                        "query": {
-                            "id": "tickers-news-stream",
-                            "version": "v1",
-                            "namespace": "finance",
-                            "listAlias": "finance-CA-en-CA-ticker-news",
-                        }
-                    },
-                    "useNCP": True,
-                    "batches": {
-                        "pagination": True,
-                        "size": 10,
-                        "timeout": 1500,
-                        "total": 170,
-                    },
-                    "category": f"YFINANCE:{companyName}",
-                },
-            }
-        }
-    }
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:130.0) Gecko/20100101 Firefox/130.0",
-        "Content-Type": "application/json",
-    }
-    resp = requests.post(url, json=data, headers=headers, verify=False).json()
-    return resp["g0"]["data"]["stream_pagination"]["gqlVariables"]["tickerStream"][
-        "pagination"
-    ]["uuids"]
+llm_config = {"config_list": config_list, "timeout": 60}
 
+# Stream the final report to disk as it is generated, set REPORT_STREAMING=true to enable it
+REPORT_STREAMING = os.environ.get("REPORT_STREAMING", "false").lower() == "true"
 
-llm_config = {"config_list": config_list, "timeout": 60}
 
-financial_assistant = autogen.AssistantAgent(
-    name="financial_assistant",
-    llm_config=llm_config,
-)
+def create_agents(work_dir: str = "workspace") -> dict:
+    """The agents of one analysis with their tools, code and charts going to work_dir.
 
-research_assistant = autogen.AssistantAgent(
-    name="research_assistant",
-    llm_config=llm_config,
-)
+    Each concurrent analysis needs its own agents, as they keep the chat history per recipient.
+    """
+    financial_assistant = autogen.AssistantAgent(
+        name="financial_assistant",
+        llm_config=llm_config,
+    )
 
-report_writer = autogen.AssistantAgent(
-    name="report_writer",
-    llm_config=llm_config,
-)
+    research_assistant = autogen.AssistantAgent(
+        name="research_assistant",
+        llm_config=llm_config,
+    )
 
-user_proxy = autogen.UserProxyAgent(
-    name="user_proxy",
-    human_input_mode="NEVER",
-    max_consecutive_auto_reply=10,
-    code_execution_config={
-        "work_dir": "workspace",
-        "use_docker": False,
-    },
-)
+    report_writer = autogen.AssistantAgent(
+        name="report_writer",
+        llm_config={**llm_config, "stream": True} if REPORT_STREAMING else llm_config,
+    )
 
+    user_proxy = autogen.UserProxyAgent(
+        name="user_proxy",
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=10,
+        code_execution_config={
+            "work_dir": work_dir,
+            "use_docker": False,
+        },
+    )
 
-# code retrieved and modified from https://stackoverflow.com/questions/79019497/retrieving-news-articles-from-yahoo-finance-canada-website
-@financial_assistant.register_for_llm(
-    name="get_news_links", description="Get news links to a given company code."
-)
-@user_proxy.register_for_execution(name="get_news_links")
-def get_news_links(companyCode: str) -> str:
-    result = getUuids(companyCode)
-    remove_junk = re.sub(":STORY|:VIDEO", "", result)
-    result_url = f"https://ca.finance.yahoo.com/caas/content/article/?uuid={remove_junk}&appid=article2_csn"
-    result_resp = requests.get(result_url, verify=False).json()
+    autogen.register_function(
+        get_news_links,
+        caller=financial_assistant,
+        executor=user_proxy,
+        name="get_news_links",
+        description="Get news links to a given company code.",
+    )
+    autogen.register_function(
+        scrape_and_summarize_yahoo_finance,
+        caller=financial_assistant,
+        executor=user_proxy,
+        name="summarize_news",
+        description="Summarize news from a given URL.",
+    )
+    autogen.register_function(
+        news_digest,
+        caller=financial_assistant,
+        executor=user_proxy,
+        name="get_news_digest",
+        description="Get the key sentences of a company's n most recent news articles, all at once.",
+    )
+
+    async def price_changes(ticker: str) -> str:
+        return await asyncio.to_thread(
+            get_price_changes, ticker, os.path.join(work_dir, "stock_price_change.png")
+        )
+
+    autogen.register_function(
+        price_changes,
+        caller=research_assistant,
+        executor=user_proxy,
+        name="get_price_changes",
+        description="Get the 1-month, 3-month, YTD and 1-year price changes of a stock ticker and plot its 1-year price change graph to stock_price_change.png.",
+    )
+
+    return {
+        "financial_assistant": financial_assistant,
+        "research_assistant": research_assistant,
+        "report_writer": report_writer,
+        "user_proxy": user_proxy,
+    }
 
+
+# code retrieved and modified from https://stackoverflow.com/questions/79019497/retrieving-news-articles-from-yahoo-finance-canada-website
+# The tools run their network calls in a thread, so they don't block the other chats
+async def get_news_links(companyCode: str) -> str:
     all_links = ""
-    max_news = 5
-    for i in result_resp["items"]:
-        try:
-            news_modifiedDate = i["data"]["partnerData"]["modifiedDate"]
-            if "2025" in news_modifiedDate:
-                news_urls = i["data"]["partnerData"]["finalUrl"]
-                news_title = i["data"]["partnerData"]["pageTitle"]
-                all_links += f"News URL:  {news_urls}\nModifiedDate: {news_modifiedDate}\nTitle: {news_title}\n\n"
-                max_news -= 1
-        except Exception:
-            pass
-        if max_news == 0:
-            break
+    for item in await asyncio.to_thread(get_news_items, companyCode):
+        all_links += f"News URL:  {item['url']}\nModifiedDate: {item['modified_date']}\nTitle: {item['title']}\n\n"
 
     if all_links == "":
         return "No news found. The company code may be incorrect, or please use a different way to search for news."
@@ -116,11 +114,9 @@ def get_news_links(companyCode: str) -> str:
     return all_links
 
 
-@financial_assistant.register_for_llm(
-    name="summarize_news", description="Summarize news from a given URL."
-)
-@user_proxy.register_for_execution(name="summarize_news")
-def scrape_and_summarize_yahoo_finance(url: str, summary_length=1000) -> str:
+async def scrape_and_summarize_yahoo_finance(
+    url: str, summary_length: int = 1000
+) -> str:
     """
     Scrapes a Yahoo Finance article from the given URL and returns a summarized version.
 
@@ -131,34 +127,35 @@ def scrape_and_summarize_yahoo_finance(url: str, summary_length=1000) -> str:
     Returns:
     - str: A summarized version of the article.
     """
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise an error for bad responses
+    return await asyncio.to_thread(fetch_article, url, summary_length)
 
-        # Parse the content using BeautifulSoup
-        soup = BeautifulSoup(response.text, "html.parser")
 
-        # Extract the article text
-        article_paragraphs = soup.find_all("p")
-        article_text = "\n".join([p.get_text() for p in article_paragraphs])
-
-        # Summarize the content
-        summary = textwrap.fill(article_text[:summary_length], width=80)
-        return summary
-
-    except requests.exceptions.RequestException as e:
-        return f"Error fetching article: {e}"
+async def news_digest(ticker: str, n: int = 5) -> str:
+    return await asyncio.to_thread(
+        get_news_digest, ticker, n, token_budget=DIGEST_TOKEN_BUDGET
+    )
 
 
-async def main():
+async def analyze_stock(
+    stock_str: str,
+    agents: dict,
+    report_path: str = "market_analysis_report.md",
+    work_dir: str = "workspace",
+    echo: bool = True,
+) -> str:
+    """Run the news, price and report chats for a stock and write the report to report_path.
 
-    # get user input
-    stock_str = input("Enter the stock you want to investigate: ")
+    The chart links of the report are rewritten to the chart saved in work_dir. With `echo` off, the
+    streamed report is not printed to the console.
+    """
+    financial_assistant = agents["financial_assistant"]
+    research_assistant = agents["research_assistant"]
+    report_writer = agents["report_writer"]
+    user_proxy = agents["user_proxy"]
 
     financial_tasks = [
-        f"Can you read recent news about {stock_str} stock? Retrieve the news links and get summaries for all news using functions.",
-        f"Get the Monthly, 3 Months, YTD and one-year stock price change for {stock_str}. Plot a 1-year stock price change graph and save to `stock_price_change.png`.",
+        f"Can you read recent news about {stock_str} stock? Get the news digest with one function call.",
+        f"Get the Monthly, 3 Months, YTD and one-year stock price change for {stock_str}, and a 1-year stock price change graph saved to `stock_price_change.png`. Use the price change function, and only write code if it can't provide them.",
         "You are given recent news and price changes about a stock. please write a comprehensive market analysis report in markdown and give your conclusion on whether to hold, sell or buy it. Incorporating all findings, and include the plot `stock_price_change.png` from the previous task. Return the report in ```markdown``` format.",
     ]
 
@@ -185,22 +182,63 @@ async def main():
         news_summary_task, price_change_task
     )
 
-    user_proxy._code_execution_config = False
-    report = await user_proxy.a_initiate_chat(
-        recipient=report_writer,
-        message=f"News summary: {news_summary.summary}\n\nStock price change: {price_change.summary}\n\n{financial_tasks[2]}",
-        max_turns=1,
+    chart_path = os.path.relpath(
+        os.path.join(work_dir, "stock_price_change.png"),
+        os.path.dirname(report_path) or ".",
     )
+    message = f"News summary: {news_summary.summary}\n\nStock price change: {price_change.summary}\n\n{financial_tasks[2]}"
+
+    user_proxy._code_execution_config = False
+    if REPORT_STREAMING:
+        # The report chat runs in a thread with its own output stream, which writes the tokens to disk
+        writer = MarkdownReportWriter(
+            report_path, {"stock_price_change.png": chart_path}
+        )
+
+        def write_report():
+            with IOStream.set_default(ReportStream(writer, echo)):
+                return user_proxy.initiate_chat(
+                    recipient=report_writer, message=message, max_turns=1
+                )
+
+        try:
+            report = await asyncio.to_thread(write_report)
+        finally:
+            writer.close()
+        if writer.bytes_written:
+            print(
+                f"{report_path}: first byte written after {writer.ttfb:.2f}s, {writer.bytes_written} bytes"
+            )
+            return report_path
+        # Nothing was streamed, e.g. the model configuration doesn't stream: write the complete answer
+        print(f"{report_path}: no streamed output, writing the complete report")
+    else:
+        report = await user_proxy.a_initiate_chat(
+            recipient=report_writer,
+            message=message,
+            max_turns=1,
+        )
 
     md_report = report.summary.split("```markdown")[1].split("```")[0]
-    md_report.replace(
-        "(stock_price_change.png)", "(./workspace/stock_price_change.png)"
-    )
-    with open("market_analysis_report.md", "w") as file:
+    md_report = md_report.replace("(stock_price_change.png)", f"({chart_path})")
+    with open(report_path, "w") as file:
         file.write(md_report)
+    return report_path
 
 
-if __name__ == "__main__":
-    import asyncio
+async def main():
 
+    # get user input
+    stock_str = input("Enter the stock you want to investigate: ")
+
+    await analyze_stock(stock_str, create_agents())
+
+    cache_stats = http_cache.stats()
+    print(
+        f"HTTP cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%}), {cache_stats['bytes_saved'] / 1024:.1f} kB not downloaded again"
+    )
+
+
+if __name__ == "__main__":
     chat_results = asyncio.run(main())
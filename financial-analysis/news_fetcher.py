@@ -0,0 +1,301 @@
+import json
+import os
+import re
+import textwrap
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.exceptions import InsecureRequestWarning
+
+from article_extractor import CHUNK_SIZE, extract_paragraphs, iter_chunks
+from http_cache import HttpCache
+from news_summarizer import summarize_articles
+
+requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+
+YAHOO_FINANCE_URL = os.environ.get("YAHOO_FINANCE_URL", "https://ca.finance.yahoo.com")
+
+# Articles fetched at the same time, also the size of the session's connection pool
+MAX_CONCURRENT_FETCHES = int(os.environ.get("NEWS_MAX_CONCURRENT_FETCHES", "8"))
+
+# (connect, read) timeouts in seconds, so one slow site can't hold up the whole digest
+REQUEST_TIMEOUT = (5, 15)
+
+# Only news modified within this many days is given to the agents
+NEWS_MAX_AGE_DAYS = int(os.environ.get("NEWS_MAX_AGE_DAYS", "90"))
+
+# How long a ticker's news stream is reused before asking for it again, by default
+UUID_TTL_SECONDS = int(os.environ.get("NEWS_UUID_TTL_SECONDS", str(15 * 60)))
+
+http_cache = HttpCache(
+    os.environ.get("HTTP_CACHE_PATH", ".http_cache.sqlite"),
+    ttl_seconds=UUID_TTL_SECONDS,
+)
+
+# Characters read from each article when the digest is summarized under a token budget
+ARTICLE_TEXT_LIMIT = int(os.environ.get("NEWS_ARTICLE_TEXT_LIMIT", "8000"))
+
+# Token budget of the summarized news digest given to the LLM
+DIGEST_TOKEN_BUDGET = int(os.environ.get("NEWS_DIGEST_TOKEN_BUDGET", "1500"))
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:130.0) Gecko/20100101 Firefox/130.0",
+}
+
+
+def create_session() -> requests.Session:
+    """A session reusing its connections, with a pool large enough for the concurrent fetches."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=MAX_CONCURRENT_FETCHES, pool_maxsize=MAX_CONCURRENT_FETCHES
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    session.verify = False
+    return session
+
+
+session = create_session()
+
+
+# code retrieved from https://stackoverflow.com/questions/79019497/retrieving-news-articles-from-yahoo-finance-canada-website
+def getUuids(
+    companyName,
+    session: requests.Session = session,
+    ttl_seconds: Optional[float] = None,
+):
+    # The stream has no validators, it is reused for ttl_seconds (the cache's ttl_seconds by default)
+    key = f"uuids:{companyName.upper()}"
+    entry = http_cache.get(
+        key, http_cache.ttl_seconds if ttl_seconds is None else ttl_seconds
+    )
+    if entry is not None:
+        http_cache.record(hit=True, bytes_saved=entry["size"])
+        return entry["content"]
+
+    url = f"{YAHOO_FINANCE_URL}/_finance_doubledown/api/resource?bkt=finance-CA-en-CA-def&device=desktop&ecma=modern"
+    data = {
+        "requests": {
+            "g0": {
+                "resource": "StreamService",
+                "operation": "read",
+                "params": {
+                    "forceJpg": True,
+                    "releasesParams": {"limit": 50, "offset": 0},
+                    "ncpParams": {
+                        "query": {
+                            "id": "tickers-news-stream",
+                            "version": "v1",
+                            "namespace": "finance",
+                            "listAlias": "finance-CA-en-CA-ticker-news",
+                        }
+                    },
+                    "useNCP": True,
+                    "batches": {
+                        "pagination": True,
+                        "size": 10,
+                        "timeout": 1500,
+                        "total": 170,
+                    },
+                    "category": f"YFINANCE:{companyName}",
+                },
+            }
+        }
+    }
+    headers = {"Content-Type": "application/json"}
+    with session.post(
+        url, json=data, headers=headers, timeout=REQUEST_TIMEOUT
+    ) as response:
+        resp = response.json()
+    uuids = resp["g0"]["data"]["stream_pagination"]["gqlVariables"]["tickerStream"][
+        "pagination"
+    ]["uuids"]
+    http_cache.set(key, uuids, len(response.content))
+    http_cache.record(hit=False)
+    return uuids
+
+
+def _conditional_get(
+    url: str, key: str, parse, session: requests.Session = session, stream=False
+) -> str:
+    """GET a url and parse the response, reusing the cached result if the server answers 304.
+
+    Only the parsed result and the ETag and Last-Modified validators are stored, so a response that
+    was not modified is neither downloaded nor parsed again. With `stream`, parse can stop reading
+    the body early, and its size is taken from the Content-Length header.
+    """
+    entry = http_cache.get(key)
+    response = session.get(
+        url,
+        headers=http_cache.conditional_headers(entry),
+        timeout=REQUEST_TIMEOUT,
+        stream=stream,
+    )
+    # Closed on every path, so a streamed or 304 response gives its connection back to the pool
+    with response:
+        if response.status_code == 304 and entry is not None:
+            http_cache.touch(key)
+            http_cache.record(hit=True, bytes_saved=entry["size"])
+            return entry["content"]
+        response.raise_for_status()  # Raise an error for bad responses
+
+        content = parse(response)
+        etag, last_modified = (
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        if etag or last_modified:
+            size = (
+                int(response.headers.get("Content-Length") or 0)
+                if stream
+                else len(response.content)
+            )
+            http_cache.set(key, content, size, etag, last_modified)
+    http_cache.record(hit=False)
+    return content
+
+
+def _is_recent(modified_date: str, max_age_days: int) -> bool:
+    """Whether an ISO 8601 modified date is within max_age_days of now, False if it can't be parsed."""
+    try:
+        modified = datetime.fromisoformat(modified_date.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return False
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - modified <= timedelta(days=max_age_days)
+
+
+def get_news_items(
+    companyCode: str,
+    max_news: int = 5,
+    session: requests.Session = session,
+    max_age_days: int = NEWS_MAX_AGE_DAYS,
+) -> list[dict]:
+    """The most recent news of a company, as dicts with the url, modified_date and title.
+
+    News modified more than max_age_days ago is left out.
+    """
+    result = getUuids(companyCode, session)
+    remove_junk = re.sub(":STORY|:VIDEO", "", result)
+    result_url = f"{YAHOO_FINANCE_URL}/caas/content/article/?uuid={remove_junk}&appid=article2_csn"
+    result_resp = json.loads(
+        _conditional_get(
+            result_url, f"news:{remove_junk}", lambda response: response.text, session
+        )
+    )
+
+    news = []
+    for i in result_resp["items"]:
+        try:
+            partner_data = i["data"]["partnerData"]
+            news.append(
+                {
+                    "url": partner_data["finalUrl"],
+                    "modified_date": partner_data["modifiedDate"],
+                    "title": partner_data["pageTitle"],
+                }
+            )
+        except Exception:
+            pass
+    news = [item for item in news if _is_recent(item["modified_date"], max_age_days)]
+    news.sort(key=lambda item: item["modified_date"], reverse=True)
+    return news[:max_news]
+
+
+def extract_article_text(html: str, summary_length: int = 1000) -> str:
+    """The article's paragraphs, truncated to summary_length characters and wrapped."""
+    return textwrap.fill(
+        extract_paragraphs(iter_chunks(html), summary_length), width=80
+    )
+
+
+def _read_article(response: requests.Response, summary_length: int) -> str:
+    """Extract the article text from a streamed response, closing it once enough text is read."""
+    response.encoding = response.encoding or "utf-8"
+    try:
+        article_text = extract_paragraphs(
+            response.iter_content(CHUNK_SIZE, decode_unicode=True), summary_length
+        )
+    finally:
+        response.close()
+    return textwrap.fill(article_text, width=80)
+
+
+def fetch_article(
+    url: str, summary_length: int = 1000, session: requests.Session = session
+) -> str:
+    """Fetch an article and extract its text, or describe the error."""
+    try:
+        return _conditional_get(
+            url,
+            f"article:{summary_length}:{url}",
+            lambda response: _read_article(response, summary_length),
+            session,
+            stream=True,
+        )
+    except requests.exceptions.RequestException as e:
+        return f"Error fetching article: {e}"
+
+
+def get_news_digest(
+    ticker: str,
+    n: int = 5,
+    summary_length: int = 1000,
+    session: requests.Session = session,
+    max_workers: Optional[int] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """Resolve a ticker's latest n news and fetch all their articles concurrently, in one response.
+
+    Without a token budget each article is cut at summary_length characters. With one, up to
+    ARTICLE_TEXT_LIMIT characters of every article are read and the digest keeps their most relevant
+    sentences within the budget.
+    """
+    try:
+        news = get_news_items(ticker, n, session)
+    except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+        return f"Error fetching news: {e}"
+    if not news:
+        return "No news found. The company code may be incorrect, or please use a different way to search for news."
+
+    if token_budget is not None:
+        summary_length = ARTICLE_TEXT_LIMIT
+    with ThreadPoolExecutor(
+        max_workers=max_workers or MAX_CONCURRENT_FETCHES
+    ) as executor:
+        extracts = list(
+            executor.map(
+                lambda item: fetch_article(item["url"], summary_length, session), news
+            )
+        )
+
+    if token_budget is not None:
+        fetched = [
+            (item, extract)
+            for item, extract in zip(news, extracts)
+            if not extract.startswith("Error fetching article")
+        ]
+        summaries = summarize_articles(
+            [{"title": item["title"], "text": extract} for item, extract in fetched],
+            ticker,
+            token_budget,
+        )
+        summaries = dict(zip((item["url"] for item, _ in fetched), summaries))
+        extracts = [
+            (
+                textwrap.fill(" ".join(summaries[item["url"]]), width=80)
+                or "No sentences selected."
+                if item["url"] in summaries
+                else extract
+            )
+            for item, extract in zip(news, extracts)
+        ]
+    return "\n\n".join(
+        f"Title: {item['title']}\nNews URL: {item['url']}\nModifiedDate: {item['modified_date']}\n{extract}"
+        for item, extract in zip(news, extracts)
+    )
@@ -0,0 +1,132 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+STOPWORDS = set(
+    """a about above after again against all also am an and any are as at be because been before
+    being below between both but by can could did do does doing down during each few for from further
+    had has have having he her here hers him his how i if in into is it its itself just me more most
+    my no nor not now of off on once only or other our out over own said same says she should so some
+    such than that the their them then there these they this those through to too under until up us
+    very was we were what when where which while who whom why will with would year you your""".split()
+)
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'])")
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9'&-]*|\d+(?:\.\d+)?%?")
+
+# TextRank damping factor, and how much a sentence is favoured for mentioning the ticker or its headline
+DAMPING = 0.85
+TICKER_BOOST = 1.0
+HEADLINE_BOOST = 1.0
+
+# Sentences more similar than this to one already selected add nothing new
+REDUNDANCY_THRESHOLD = 0.7
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count, about 4 tokens for every 3 English words."""
+    return math.ceil(len(text.split()) * 4 / 3)
+
+
+def split_sentences(text: str) -> list[str]:
+    text = " ".join(text.split())
+    # Text cut at a character limit ends with a partial sentence, which is dropped
+    return [
+        sentence
+        for sentence in SENTENCE_PATTERN.split(text)
+        if len(sentence.split()) >= 5 and re.search(r"[.!?][\"')]?$", sentence)
+    ]
+
+
+def _terms(text: str) -> list[str]:
+    return [
+        word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS
+    ]
+
+
+def tfidf_matrix(documents: list[list[str]]) -> np.ndarray:
+    """L2-normalized TF-IDF vectors of tokenized documents, one row per document."""
+    vocabulary = {
+        term: index
+        for index, term in enumerate(sorted({t for d in documents for t in d}))
+    }
+    matrix = np.zeros((len(documents), len(vocabulary)))
+    for row, terms in enumerate(documents):
+        for term, count in Counter(terms).items():
+            matrix[row, vocabulary[term]] = 1 + math.log(count)
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def textrank(
+    similarity: np.ndarray, iterations: int = 50, tolerance: float = 1e-6
+) -> np.ndarray:
+    """PageRank scores over a sentence similarity graph."""
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0)
+    out_weight = weights.sum(axis=1, keepdims=True)
+    transition = np.divide(
+        weights, out_weight, out=np.zeros_like(weights), where=out_weight > 0
+    )
+    count = len(weights)
+    scores = np.full(count, 1 / count)
+    for _ in range(iterations):
+        updated = (1 - DAMPING) / count + DAMPING * transition.T @ scores
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def summarize_articles(
+    articles: list[dict], ticker: str, token_budget: int = 1500
+) -> list[list[str]]:
+    """Pick the most central, ticker-focused sentences of all articles within a token budget.
+
+    `articles` are dicts with a title and text. Sentences are ranked together with TextRank over their
+    TF-IDF similarities, so news repeated across articles is kept once, and favoured when they mention
+    the ticker or share words with their article's headline. Returns each article's selected
+    sentences in their original order.
+    """
+    sentences, owners = [], []
+    for index, article in enumerate(articles):
+        for sentence in split_sentences(article["text"]):
+            sentences.append(sentence)
+            owners.append(index)
+    if not sentences:
+        return [[] for _ in articles]
+
+    documents = [_terms(sentence) for sentence in sentences]
+    headlines = [_terms(article["title"]) for article in articles]
+    vectors = tfidf_matrix(documents + headlines)
+    sentence_vectors, headline_vectors = (
+        vectors[: len(sentences)],
+        vectors[len(sentences) :],
+    )
+    similarity = sentence_vectors @ sentence_vectors.T
+
+    scores = textrank(similarity)
+    scores *= 1 + HEADLINE_BOOST * np.einsum(
+        "ij,ij->i", sentence_vectors, headline_vectors[owners]
+    )
+    ticker_pattern = re.compile(rf"\b{re.escape(ticker)}\b", re.IGNORECASE)
+    scores *= [1 + TICKER_BOOST * bool(ticker_pattern.search(s)) for s in sentences]
+
+    selected, used = [], 0
+    for index in np.argsort(-scores, kind="stable"):
+        tokens = estimate_tokens(sentences[index])
+        if used + tokens > token_budget:
+            continue
+        if any(similarity[index, other] > REDUNDANCY_THRESHOLD for other in selected):
+            continue
+        selected.append(index)
+        used += tokens
+
+    summaries = [[] for _ in articles]
+    for index in sorted(selected):
+        summaries[owners[index]].append(sentences[index])
+    return summaries
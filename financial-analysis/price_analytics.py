@@ -0,0 +1,111 @@
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from price_sources import HISTORY_DAYS, CsvPriceSource, PriceSource, YFinancePriceSource
+from price_store import PriceStore
+
+# (label, offset back from the last close), the YTD window starts at the last close of the previous year
+WINDOWS = [
+    ("1 month", pd.DateOffset(months=1)),
+    ("3 months", pd.DateOffset(months=3)),
+    ("YTD", None),
+    ("1 year", pd.DateOffset(years=1)),
+]
+
+
+def create_price_source() -> PriceSource:
+    """The price source selected by PRICE_SOURCE, "yfinance" (default) or "csv" (from PRICE_CSV_DIR).
+
+    Yahoo Finance prices are kept in a local PriceStore in PRICE_STORE_DIR, unless it is set empty.
+    """
+    if os.environ.get("PRICE_SOURCE", "yfinance") == "csv":
+        return CsvPriceSource(os.environ.get("PRICE_CSV_DIR", "price_data"))
+    store_dir = os.environ.get("PRICE_STORE_DIR", ".price_store")
+    if store_dir:
+        return PriceStore(YFinancePriceSource(), store_dir)
+    return YFinancePriceSource()
+
+
+price_source = create_price_source()
+
+
+def price_changes(close: pd.Series) -> dict:
+    """Change of the last close over each of WINDOWS, from the last close on or before its start."""
+    dates = close.index.values
+    prices = close.to_numpy(dtype=float)
+    as_of = close.index[-1]
+    starts = np.array(
+        [
+            (
+                as_of - offset
+                if offset is not None
+                else pd.Timestamp(year=as_of.year - 1, month=12, day=31)
+            )
+            for _, offset in WINDOWS
+        ],
+        dtype=dates.dtype,
+    )
+    indexes = np.clip(np.searchsorted(dates, starts, side="right") - 1, 0, None)
+    changes = (prices[-1] / prices[indexes] - 1) * 100
+    return {
+        label: {
+            "start_date": close.index[index].date().isoformat(),
+            "start_price": float(prices[index]),
+            "end_price": float(prices[-1]),
+            "change_pct": float(change),
+        }
+        for (label, _), index, change in zip(WINDOWS, indexes, changes)
+    }
+
+
+def plot_price_change(ticker: str, close: pd.Series, path: str) -> None:
+    """Save a chart of the 1-year change in percent, identical for identical prices."""
+    # From the close the 1-year change starts at, the last one on or before a year ago
+    year_ago = close.index[-1] - pd.DateOffset(years=1)
+    close = close.iloc[max(close.index.searchsorted(year_ago, side="right") - 1, 0) :]
+    change = (close / close.iloc[0] - 1) * 100
+
+    figure = Figure(figsize=(10, 5), dpi=100)
+    axes = figure.subplots()
+    axes.plot(change.index, change.to_numpy(), color="tab:blue", linewidth=1.5)
+    axes.axhline(0, color="gray", linewidth=0.8)
+    axes.set_title(f"{ticker} 1-year stock price change")
+    axes.set_ylabel("Change (%)")
+    axes.grid(True, alpha=0.3)
+    figure.autofmt_xdate()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    figure.savefig(path, metadata={"Software": None})
+
+
+def get_price_changes(
+    ticker: str,
+    chart_path: Optional[str] = "workspace/stock_price_change.png",
+    source: Optional[PriceSource] = None,
+    as_of: Optional[pd.Timestamp] = None,
+) -> str:
+    """The 1-month, 3-month, YTD and 1-year price changes of a ticker, optionally saving the chart."""
+    source = source or price_source
+    end = as_of if as_of is not None else pd.Timestamp.today().normalize()
+    history = source.history([ticker], end - pd.Timedelta(days=HISTORY_DAYS), end)
+    if ticker not in history or history[ticker].empty:
+        return f"No price data found for {ticker}."
+
+    close = history[ticker]["Close"]
+    lines = [
+        f"{label}: {change['change_pct']:+.2f}% (from {change['start_price']:.2f} on {change['start_date']})"
+        for label, change in price_changes(close).items()
+    ]
+    report = (
+        f"{ticker} price changes as of {close.index[-1].date()} (close {close.iloc[-1]:.2f}):\n"
+        + "\n".join(lines)
+    )
+    if chart_path:
+        plot_price_change(ticker, close, chart_path)
+        report += (
+            f"\n1-year price change chart saved to {os.path.basename(chart_path)}."
+        )
+    return report
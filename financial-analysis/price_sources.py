@@ -0,0 +1,88 @@
+import glob
+import os
+
+import pandas as pd
+
+HISTORY_DAYS = 400
+
+
+class PriceSource:
+    """Daily OHLC history of tickers, kept in memory once downloaded.
+
+    Subclasses implement `download`, returning a DataFrame per ticker indexed by date with Open, High,
+    Low, Close and Volume columns. Tickers without data are left out.
+    """
+
+    def __init__(self):
+        self._cache = {}
+
+    def download(
+        self, tickers: list[str], start: pd.Timestamp, end: pd.Timestamp
+    ) -> dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+    def history(
+        self, tickers: list[str], start: pd.Timestamp, end: pd.Timestamp
+    ) -> dict[str, pd.DataFrame]:
+        """The history of every ticker between start and end, downloading all missing ones at once."""
+        missing = [
+            ticker
+            for ticker in tickers
+            if ticker not in self._cache
+            or self._cache[ticker][0] > start
+            or self._cache[ticker][1] < end
+        ]
+        if missing:
+            for ticker, frame in self.download(missing, start, end).items():
+                self._cache[ticker] = (start, end, frame.sort_index())
+        return {
+            ticker: self._cache[ticker][2].loc[start:end]
+            for ticker in tickers
+            if ticker in self._cache
+        }
+
+
+class YFinancePriceSource(PriceSource):
+    def download(self, tickers, start, end):
+        import yfinance as yf
+
+        data = yf.download(
+            tickers,
+            start=start,
+            end=end + pd.Timedelta(days=1),
+            auto_adjust=True,
+            group_by="ticker",
+            progress=False,
+            threads=True,
+        )
+        frames = {}
+        for ticker in tickers:
+            if ticker in data.columns.get_level_values(0):
+                frame = data[ticker].dropna(subset=["Close"])
+                if not frame.empty:
+                    frame.index = pd.DatetimeIndex(frame.index).tz_localize(None)
+                    frames[ticker] = frame
+        return frames
+
+
+class CsvPriceSource(PriceSource):
+    """Reads `<ticker>.csv` files with a Date column and OHLC columns, e.g. saved Yahoo Finance exports."""
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+
+    def tickers(self) -> list[str]:
+        return sorted(
+            os.path.splitext(os.path.basename(path))[0]
+            for path in glob.glob(os.path.join(self.directory, "*.csv"))
+        )
+
+    def download(self, tickers, start, end):
+        frames = {}
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if os.path.exists(path):
+                frame = pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+                frames[ticker] = frame.sort_index().loc[start:end]
+        return frames
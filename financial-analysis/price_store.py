@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from price_sources import HISTORY_DAYS, PriceSource
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+RECORD = np.dtype([("date", "datetime64[D]")] + [(column, "f8") for column in COLUMNS])
+
+
+class PriceStore(PriceSource):
+    """Local daily OHLCV history per ticker, read through memory maps and updated incrementally.
+
+    Each ticker is an append-only file of fixed-size records sorted by date, `<directory>/<ticker>.bin`.
+    On each request only the sessions after the last stored one are downloaded from `source` and
+    appended, so repeated analysis of the same tickers does no network I/O. Only complete sessions are
+    stored: a bar for today could still change, so it is never written. The day each ticker was last
+    updated is kept in `<directory>/checked.json`, so a day after an exchange holiday, which has no
+    session to store, is only asked for once.
+    """
+
+    def __init__(self, source: PriceSource, directory: str = ".price_store"):
+        super().__init__()
+        self.source = source
+        self.directory = directory
+        self.downloads = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._checked_path = os.path.join(directory, "checked.json")
+        self._checked = {}
+        if os.path.exists(self._checked_path):
+            with open(self._checked_path) as file:
+                self._checked = json.load(file)
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.directory, f"{ticker.upper()}.bin")
+
+    def records(self, ticker: str) -> np.ndarray:
+        """The stored records of a ticker, memory-mapped (empty if there are none)."""
+        path = self._path(ticker)
+        count = os.path.getsize(path) // RECORD.itemsize if os.path.exists(path) else 0
+        if not count:
+            return np.empty(0, dtype=RECORD)
+        # Whole records only, in case another thread is appending
+        return np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+
+    def _append(self, ticker: str, frame: pd.DataFrame, after, before) -> None:
+        dates = pd.DatetimeIndex(frame.index).values.astype("datetime64[D]")
+        keep = (dates < before) if after is None else (dates > after) & (dates < before)
+        if not keep.any():
+            return
+        rows = np.empty(int(keep.sum()), dtype=RECORD)
+        rows["date"] = dates[keep]
+        for column in COLUMNS:
+            rows[column] = frame[column].to_numpy(dtype=float)[keep]
+        rows.sort(order="date")
+        with open(self._path(ticker), "ab") as file:
+            file.write(rows.tobytes())
+
+    def update(self, tickers: list[str], end: pd.Timestamp) -> None:
+        """Download and append the complete sessions missing before `end`, grouping tickers by start."""
+        today = np.datetime64(end.date(), "D")
+        starts = {}
+        with self._lock:
+            for ticker in tickers:
+                checked = self._checked.get(ticker.upper())
+                if checked is not None and np.datetime64(checked, "D") >= today:
+                    continue  # the sessions before `end` were already asked for
+                records = self.records(ticker)
+                last = records["date"][-1] if len(records) else None
+                if last is not None and not np.busday_count(last + 1, today):
+                    continue  # up to date, no trading day is missing
+                start = (
+                    pd.Timestamp(last + 1)
+                    if last is not None
+                    else end - pd.Timedelta(days=HISTORY_DAYS)
+                )
+                starts.setdefault(start, []).append((ticker, last))
+
+            for start, group in starts.items():
+                frames = self.source.download(
+                    [ticker for ticker, _ in group], start, end
+                )
+                self.downloads += 1
+                for ticker, last in group:
+                    if ticker in frames:
+                        self._append(ticker, frames[ticker], last, today)
+                    self._checked[ticker.upper()] = str(today)
+
+            if starts:
+                with open(self._checked_path + ".tmp", "w") as file:
+                    json.dump(self._checked, file)
+                os.replace(self._checked_path + ".tmp", self._checked_path)
+
+    def download(self, tickers, start, end):
+        self.update(tickers, end)
+        frames = {}
+        for ticker in tickers:
+            with self._lock:
+                records = self.records(ticker)
+                window = slice(
+                    np.searchsorted(records["date"], np.datetime64(start.date(), "D")),
+                    np.searchsorted(
+                        records["date"], np.datetime64(end.date(), "D"), side="right"
+                    ),
+                )
+                records = records[window]
+            if len(records):
+                frames[ticker] = pd.DataFrame(
+                    {column: records[column] for column in COLUMNS},
+                    index=pd.DatetimeIndex(
+                        records["date"].astype("datetime64[ns]"), name="Date"
+                    ),
+                )
+        return frames
+
+    def history(self, tickers, start, end):
+        """Read from the store every time instead of keeping the frames in memory."""
+        return self.download(tickers, start, end)
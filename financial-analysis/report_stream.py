@@ -0,0 +1,95 @@
+import re
+import time
+from typing import Optional
+
+from autogen.io import IOConsole
+from autogen.messages.base_message import BaseMessage
+from autogen.messages.client_messages import StreamMessage
+
+FENCE = "```markdown"
+
+
+class MarkdownReportWriter:
+    """Writes the ```markdown block of a streamed completion to a file, line by line as it arrives.
+
+    Text before the block is skipped and the block ends at the next ``` line. Chart links such as
+    `(stock_price_change.png)` are rewritten to `image_paths` on the way. Only the current line is held
+    in memory, apart from the text before the block, which is written as the report if no block comes.
+    `ttfb` is the time in seconds from creation until the first byte was written.
+    """
+
+    def __init__(self, path: str, image_paths: Optional[dict] = None):
+        self.path = path
+        self.image_patterns = [
+            (re.compile(rf"\((?:\./)?{re.escape(name)}\)"), f"({target})")
+            for name, target in (image_paths or {}).items()
+        ]
+        self.ttfb: Optional[float] = None
+        self.bytes_written = 0
+        self._started = time.perf_counter()
+        self._file = open(path, "w")
+        self._preamble = ""
+        self._line = ""
+        self._in_block = False
+        self._done = False
+
+    def _write_line(self, line: str) -> None:
+        for pattern, replacement in self.image_patterns:
+            line = pattern.sub(replacement, line)
+        if self.ttfb is None:
+            self.ttfb = time.perf_counter() - self._started
+        self._file.write(line)
+        self._file.flush()
+        self.bytes_written += len(line.encode())
+
+    def write(self, text: str) -> None:
+        if self._done:
+            return
+        if not self._in_block:
+            self._preamble += text
+            start = self._preamble.find(FENCE)
+            if start < 0:
+                return
+            # The block starts on the line after the fence
+            text = self._preamble[start + len(FENCE) :]
+            newline = text.find("\n")
+            if newline < 0:
+                self._preamble = self._preamble[start:]
+                return
+            self._in_block, self._preamble, text = True, "", text[newline + 1 :]
+
+        self._line += text
+        while "\n" in self._line and not self._done:
+            line, self._line = self._line.split("\n", 1)
+            if line.strip().startswith("```"):
+                self._done = True
+            else:
+                self._write_line(line + "\n")
+
+    def close(self) -> None:
+        if not self._in_block and self._preamble:
+            # No markdown block, keep the whole answer as the report
+            self._in_block, text, self._preamble = True, self._preamble, ""
+            self.write(text + "\n")
+        elif not self._done and self._line and not self._line.strip().startswith("```"):
+            self._write_line(self._line)
+        self._file.close()
+
+
+class ReportStream(IOConsole):
+    """Console output that also sends the streamed completion chunks to a MarkdownReportWriter.
+
+    The LLM client sends each chunk as a StreamMessage; its text goes to the writer without the
+    terminal colour codes the console adds. With `echo` off nothing is printed to the console.
+    """
+
+    def __init__(self, writer: MarkdownReportWriter, echo: bool = True):
+        self.writer = writer
+        self.echo = echo
+
+    def send(self, message: BaseMessage) -> None:
+        if isinstance(message, StreamMessage):
+            # The message class is a wrapper, the chunk is the content of its content
+            self.writer.write(message.content.content)
+        if self.echo:
+            super().send(message)
@@ -0,0 +1,86 @@
+import os
+
+import matplotlib.image
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+
+from price_analytics import get_price_changes, price_changes
+from price_sources import CsvPriceSource
+
+# Closes in test_data/TEST.csv picked so each window starts on a known row
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "test_data")
+AS_OF = pd.Timestamp("2025-06-30")
+
+
+@pytest.fixture
+def close():
+    source = CsvPriceSource(FIXTURE_DIR)
+    return source.history(["TEST"], AS_OF - pd.Timedelta(days=400), AS_OF)["TEST"][
+        "Close"
+    ]
+
+
+def test_price_changes_start_at_the_last_close_before_each_window(close):
+    changes = price_changes(close)
+
+    assert {
+        label: (change["start_date"], change["start_price"])
+        for label, change in changes.items()
+    } == {
+        "1 month": ("2025-05-30", 225.0),
+        "3 months": ("2025-03-28", 220.0),
+        "YTD": ("2024-12-31", 200.0),
+        "1 year": ("2024-06-28", 160.0),
+    }
+    assert {
+        label: change["change_pct"] for label, change in changes.items()
+    } == pytest.approx(
+        {
+            "1 month": 100 * (240 / 225 - 1),
+            "3 months": 100 * (240 / 220 - 1),
+            "YTD": 20.0,
+            "1 year": 50.0,
+        }
+    )
+
+
+def test_report_and_chart(tmp_path, monkeypatch):
+    figures = []
+    savefig = Figure.savefig
+
+    def keep_figure(figure, *args, **kwargs):
+        figures.append(figure)
+        savefig(figure, *args, **kwargs)
+
+    monkeypatch.setattr(Figure, "savefig", keep_figure)
+    source = CsvPriceSource(FIXTURE_DIR)
+    chart = tmp_path / "stock_price_change.png"
+
+    report = get_price_changes("TEST", str(chart), source, AS_OF)
+
+    assert report == (
+        "TEST price changes as of 2025-06-30 (close 240.00):\n"
+        "1 month: +6.67% (from 225.00 on 2025-05-30)\n"
+        "3 months: +9.09% (from 220.00 on 2025-03-28)\n"
+        "YTD: +20.00% (from 200.00 on 2024-12-31)\n"
+        "1 year: +50.00% (from 160.00 on 2024-06-28)\n"
+        "1-year price change chart saved to stock_price_change.png."
+    )
+    # The line goes from the 1-year start to the last close, 0% to +50%
+    line = figures[0].axes[0].lines[0]
+    assert pd.Timestamp(line.get_xdata()[0]) == pd.Timestamp("2024-06-28")
+    assert line.get_ydata()[[0, -1]].tolist() == pytest.approx([0.0, 50.0])
+    # 10x5 inches at 100 dpi, rendered the same for the same prices
+    assert matplotlib.image.imread(chart).shape[:2] == (500, 1000)
+    again = tmp_path / "again.png"
+    get_price_changes("TEST", str(again), source, AS_OF)
+    assert again.read_bytes() == chart.read_bytes()
+
+
+def test_unknown_ticker():
+    source = CsvPriceSource(FIXTURE_DIR)
+
+    assert get_price_changes("NOPE", None, source, AS_OF) == (
+        "No price data found for NOPE."
+    )
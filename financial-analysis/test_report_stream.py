@@ -0,0 +1,46 @@
+from autogen.io import IOStream
+from autogen.messages.client_messages import StreamMessage
+
+from report_stream import MarkdownReportWriter, ReportStream
+
+CHUNKS = [
+    "Here is the report:\n``",
+    "`markdown\n# AAPL market",
+    " analysis\n\n![Price change](stock_price_change.png)\n",
+    "Buy.\n```\nAnything after the block.",
+]
+
+
+def stream_report(path, echo):
+    writer = MarkdownReportWriter(
+        str(path), {"stock_price_change.png": "workspace/stock_price_change.png"}
+    )
+    with IOStream.set_default(ReportStream(writer, echo)):
+        # As the LLM client sends the chunks of a streamed completion
+        for chunk in CHUNKS:
+            IOStream.get_default().send(StreamMessage(content=chunk))
+        IOStream.get_default().print("report_writer (to user_proxy):")
+    writer.close()
+    return writer
+
+
+def test_stream_messages_are_written_to_the_report(tmp_path, capsys):
+    writer = stream_report(tmp_path / "report.md", echo=False)
+
+    assert (tmp_path / "report.md").read_text() == (
+        "# AAPL market analysis\n\n"
+        "![Price change](workspace/stock_price_change.png)\n"
+        "Buy.\n"
+    )
+    assert writer.ttfb is not None
+    assert writer.bytes_written == len((tmp_path / "report.md").read_bytes())
+    assert capsys.readouterr().out == ""
+
+
+def test_echo_prints_the_chunks_and_messages(tmp_path, capsys):
+    stream_report(tmp_path / "report.md", echo=True)
+
+    out = capsys.readouterr().out
+    assert "# AAPL market" in out
+    assert "report_writer (to user_proxy):" in out
+    assert "\033[" not in (tmp_path / "report.md").read_text()
@@ -0,0 +1,356 @@
+"""Benchmarks for the travel planner's local components, no API keys needed and FalkorDB optional.
+
+route-optimizer runs on its own. The other benchmarks import the app's modules when they run, so they
+need its requirements (ag2, graphrag_sdk) installed.
+
+Usage:
+    python benchmark.py route-optimizer
+    python benchmark.py structured-loader [--host 0.0.0.0 --port 6379]
+    python benchmark.py query-cache --host 0.0.0.0 [--port 6379] [--with-llm]
+    python benchmark.py indexes --host 0.0.0.0 [--port 6379]
+    python benchmark.py itinerary-store
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+import tracemalloc
+
+from route_optimizer import optimize_day_order
+
+WALKING_METERS_PER_SECOND = 1.4
+
+
+def _synthetic_day(event_count: int, rng: random.Random):
+    """Random events within a 4km square, two of them restaurants, with walking-time matrix."""
+    points = [(rng.uniform(0, 4000), rng.uniform(0, 4000)) for _ in range(event_count)]
+    event_types = ["Attraction"] * event_count
+    for index in rng.sample(range(event_count), 2):
+        event_types[index] = "Restaurant"
+    matrix = [
+        [math.dist(a, b) * 1.3 / WALKING_METERS_PER_SECOND for b in points]
+        for a in points
+    ]
+    return event_types, matrix
+
+
+def benchmark_route_optimizer(days_per_size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    print(f"{'events':>6} {'method':>10} {'saved %':>8} {'p50 ms':>9} {'max ms':>9}")
+    for event_count in range(5, 21):
+        runtimes, savings, methods = [], [], set()
+        for _ in range(days_per_size):
+            event_types, matrix = _synthetic_day(event_count, rng)
+            report = optimize_day_order(event_types, matrix)
+            runtimes.append(report["runtime_ms"])
+            methods.add(report["method"])
+            if report["original_travel_seconds"]:
+                savings.append(
+                    100
+                    * (
+                        report["original_travel_seconds"]
+                        - report["optimized_travel_seconds"]
+                    )
+                    / report["original_travel_seconds"]
+                )
+        print(
+            f"{event_count:>6} {'/'.join(sorted(methods)):>10} {statistics.mean(savings):>8.1f} "
+            + f"{statistics.median(runtimes):>9.2f} {max(runtimes):>9.2f}"
+        )
+
+
+class _DryRunGraph:
+    """Stands in for a FalkorDB graph when no database is given, only counting the queries."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def query(self, cypher, params=None):
+        self.queries += 1
+
+
+def benchmark_structured_loader(restaurant_count: int, host: str, port: int) -> None:
+    """Load synthetic restaurants spread over the real cities, at increasing sizes."""
+    from ontology import get_trip_ontology
+    from structured_loader import build_graph_rows, insert_graph_rows
+
+    rng = random.Random(0)
+    ontology = get_trip_ontology()
+    with open("./trip_planner_data/cities.json") as f:
+        cities = json.load(f)
+    food_types = ["Italian", "Pizza", "Seafood", "Burgers", "Vegetarian", "Gelato"]
+
+    if host:
+        from falkordb import FalkorDB
+
+        falkordb = FalkorDB(host=host, port=port)
+    print(
+        f"{'restaurants':>11} {'map s':>8} {'insert s':>9} {'queries':>8} {'rows/s':>10}"
+    )
+    for count in (restaurant_count // 10, restaurant_count // 2, restaurant_count):
+        restaurants = [
+            {
+                "name": f"Restaurant {index}",
+                "description": "A synthetic restaurant for benchmarking.",
+                "city": rng.choice(cities)["name"],
+                "rating": round(rng.uniform(3, 5), 1),
+                "food_type": rng.choice(food_types),
+            }
+            for index in range(count)
+        ]
+
+        started = time.perf_counter()
+        nodes, edges = build_graph_rows(
+            {"City": cities, "Restaurant": restaurants}, ontology
+        )
+        mapped = time.perf_counter()
+        graph = falkordb.select_graph("trip_data_benchmark") if host else _DryRunGraph()
+        queries = insert_graph_rows(graph, nodes, edges, ontology)
+        inserted = time.perf_counter()
+        if host:
+            graph.delete()
+
+        rows = sum(len(rows) for rows in nodes.values()) + sum(
+            len(rows) for rows in edges.values()
+        )
+        print(
+            f"{count:>11} {mapped - started:>8.2f} {inserted - mapped:>9.2f} {queries:>8} "
+            + f"{rows / (inserted - started):>10.0f}"
+        )
+
+
+def benchmark_query_cache(host: str, port: int, repeats: int, with_llm: bool) -> None:
+    """Answer common questions against the ingested trip_data graph, repeatedly.
+
+    The first round is answered by the prepared templates, later rounds by the cache. With --with-llm,
+    the same questions also go through the LLM-generated Cypher of FalkorGraphQueryEngine.
+    """
+    from falkordb import FalkorDB
+
+    from graph_query_cache import CachedGraphQueryEngine, format_percentiles
+    from ingestion_manifest import IngestionManifest
+    from ontology import get_trip_ontology
+
+    questions = [
+        "Restaurants in Rome",
+        "Attractions in Florence",
+        "Italian restaurants rated above 4.5",
+        "Historical attractions in Rome",
+        "Please list the restaurants and attractions in Venice.",
+    ]
+    query_engine = None
+    if with_llm:
+        from autogen.agentchat.contrib.graph_rag.falkor_graph_query_engine import (
+            FalkorGraphQueryEngine,
+        )
+        from graphrag_sdk.models.openai import OpenAiGenerativeModel
+
+        query_engine = FalkorGraphQueryEngine(
+            name="trip_data",
+            host=host,
+            port=port,
+            ontology=get_trip_ontology(),
+            model=OpenAiGenerativeModel("gpt-4o"),
+        )
+        query_engine.connect_db()
+
+    graph = FalkorDB(host=host, port=port).select_graph("trip_data")
+    cached_query_engine = CachedGraphQueryEngine(
+        query_engine, graph, IngestionManifest(graph_name="trip_data")
+    )
+    for _ in range(repeats):
+        for question in questions:
+            cached_query_engine.query(question)
+    print(cached_query_engine.latency_report())
+
+    if query_engine is not None:
+        latencies = []
+        for question in questions:
+            started = time.perf_counter()
+            query_engine.query(question)
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"  LLM-generated Cypher: {format_percentiles(latencies)}")
+
+
+def benchmark_indexes(
+    host: str, port: int, restaurant_count: int, repeats: int
+) -> None:
+    """Query latency on a large synthetic city, before and after creating the ontology's indexes."""
+    from falkordb import FalkorDB
+
+    from graph_indexes import create_ontology_indexes
+    from ontology import get_trip_ontology
+
+    rng = random.Random(0)
+    graph = FalkorDB(host=host, port=port).select_graph("trip_data_index_benchmark")
+    food_types = ["Italian", "Pizza", "Seafood", "Burgers", "Vegetarian", "Gelato"]
+    rows = [
+        {
+            "name": f"Restaurant {index}",
+            "rating": round(rng.uniform(3, 5), 2),
+            "food_type": rng.choice(food_types),
+        }
+        for index in range(restaurant_count)
+    ]
+    graph.query("CREATE (:City {name: 'Rome'})")
+    for start in range(0, len(rows), 10000):
+        graph.query(
+            "UNWIND $rows AS row MATCH (c:City {name: 'Rome'}) "
+            "CREATE (r:Restaurant)-[:IN_CITY]->(c) SET r = row",
+            {"rows": rows[start : start + 10000]},
+        )
+
+    queries = {
+        "name lookup": (
+            "MATCH (r:Restaurant {name: $name}) RETURN r.rating",
+            {"name": f"Restaurant {restaurant_count // 2}"},
+        ),
+        "rating >= 4.95": (
+            "MATCH (r:Restaurant) WHERE r.rating >= $rating RETURN count(r)",
+            {"rating": 4.95},
+        ),
+        "food_type = Gelato": (
+            "MATCH (r:Restaurant) WHERE r.food_type = $food_type RETURN count(r)",
+            {"food_type": "Gelato"},
+        ),
+    }
+
+    def measure() -> dict:
+        latencies = {}
+        for name, (cypher, params) in queries.items():
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                graph.query(cypher, params)
+                samples.append((time.perf_counter() - started) * 1000)
+            latencies[name] = statistics.median(samples)
+        return latencies
+
+    try:
+        before = measure()
+        create_ontology_indexes(graph, get_trip_ontology())
+        after = measure()
+    finally:
+        graph.delete()
+
+    print(f"{restaurant_count} restaurants in one city, median of {repeats} queries")
+    print(f"{'query':>20} {'before ms':>10} {'after ms':>10}")
+    for name in queries:
+        print(f"{name:>20} {before[name]:>10.2f} {after[name]:>10.2f}")
+
+
+def benchmark_itinerary_store(weeks: int, events_per_day: int, repeats: int) -> None:
+    """Handing a multi-week itinerary between agents as JSON, versus the shared ItineraryStore.
+
+    The JSON hand-off re-parses and re-validates the itinerary at each hop (structured output, route
+    timing, printing), the store validates once, mutates in place and serializes once at the end.
+    """
+    from google_map_platforms import Day, Event, Itinerary
+    from itinerary_store import ItineraryStore
+
+    itinerary_json = Itinerary(
+        days=[
+            Day(
+                events=[
+                    Event(
+                        type="Restaurant" if index in (2, 5) else "Attraction",
+                        location=f"Place {day}-{index}",
+                        city="Rome",
+                        description="A synthetic event with a description of typical length "
+                        * 3,
+                    )
+                    for index in range(events_per_day)
+                ]
+            )
+            for day in range(weeks * 7)
+        ]
+    ).model_dump_json()
+
+    def json_hand_off():
+        itinerary = Itinerary.model_validate(json.loads(itinerary_json))
+        timed_itinerary = itinerary.model_dump()
+        for day in timed_itinerary["days"]:
+            for event in day["events"]:
+                event["location"]
+        return json.dumps(timed_itinerary)
+
+    def store_hand_off():
+        itinerary_store = ItineraryStore.from_json(itinerary_json)
+        itinerary_store.mark_changed()
+        for day in itinerary_store.itinerary.days:
+            for event in day.events:
+                event.location
+        return itinerary_store.to_json()
+
+    print(
+        f"{weeks} weeks, {weeks * 7 * events_per_day} events, {len(itinerary_json) // 1024} KiB of JSON"
+    )
+    print(f"{'hand-off':>10} {'median ms':>10} {'peak KiB':>10}")
+    for name, hand_off in (("json", json_hand_off), ("store", store_hand_off)):
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            hand_off()
+            samples.append((time.perf_counter() - started) * 1000)
+        tracemalloc.start()
+        hand_off()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>10} {statistics.median(samples):>10.2f} {peak // 1024:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    route_parser = subparsers.add_parser(
+        "route-optimizer", help="Optimize synthetic days with 5 to 20 events"
+    )
+    route_parser.add_argument("--days", type=int, default=20)
+    route_parser.add_argument("--seed", type=int, default=0)
+
+    loader_parser = subparsers.add_parser(
+        "structured-loader",
+        help="Load synthetic restaurants, into FalkorDB if --host is given",
+    )
+    loader_parser.add_argument("--restaurants", type=int, default=100000)
+    loader_parser.add_argument("--host", default=None)
+    loader_parser.add_argument("--port", type=int, default=6379)
+
+    cache_parser = subparsers.add_parser(
+        "query-cache", help="Query the ingested trip_data graph with and without cache"
+    )
+    cache_parser.add_argument("--host", required=True)
+    cache_parser.add_argument("--port", type=int, default=6379)
+    cache_parser.add_argument("--repeats", type=int, default=20)
+    cache_parser.add_argument("--with-llm", action="store_true")
+
+    index_parser = subparsers.add_parser(
+        "indexes", help="Query latency before and after creating the ontology indexes"
+    )
+    index_parser.add_argument("--host", required=True)
+    index_parser.add_argument("--port", type=int, default=6379)
+    index_parser.add_argument("--restaurants", type=int, default=200000)
+    index_parser.add_argument("--repeats", type=int, default=20)
+
+    store_parser = subparsers.add_parser(
+        "itinerary-store", help="JSON hand-off versus the shared itinerary store"
+    )
+    store_parser.add_argument("--weeks", type=int, default=4)
+    store_parser.add_argument("--events-per-day", type=int, default=8)
+    store_parser.add_argument("--repeats", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.benchmark == "route-optimizer":
+        benchmark_route_optimizer(args.days, args.seed)
+    elif args.benchmark == "structured-loader":
+        benchmark_structured_loader(args.restaurants, args.host, args.port)
+    elif args.benchmark == "query-cache":
+        benchmark_query_cache(args.host, args.port, args.repeats, args.with_llm)
+    elif args.benchmark == "indexes":
+        benchmark_indexes(args.host, args.port, args.restaurants, args.repeats)
+    elif args.benchmark == "itinerary-store":
+        benchmark_itinerary_store(args.weeks, args.events_per_day, args.repeats)
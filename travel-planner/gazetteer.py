@@ -0,0 +1,118 @@
+import glob
+import json
+import os
+import re
+import unicodedata
+from typing import Optional
+
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371000
+
+# Average door-to-door speeds used when estimating a leg without the Maps API
+SPEED_METERS_PER_SECOND = {
+    "walking": 1.4,
+    "bicycling": 4.2,
+    "transit": 8.0,
+    "driving": 12.0,
+}
+
+# Streets are not straight lines, scale the great-circle distance to approximate the route distance
+DETOUR_FACTOR = 1.3
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation, and drop a leading 'the'."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+    return name[4:] if name.startswith("the ") else name
+
+
+class Gazetteer:
+    """Name to coordinates index built from the trip data files.
+
+    Records with a `city` field (attractions, restaurants) are indexed as places within that city,
+    records without one (cities) as cities.
+    """
+
+    def __init__(self, data_dir: str = "./trip_planner_data"):
+        self.places = {}
+        self.cities = {}
+        for path in sorted(glob.glob(os.path.join(data_dir, "*.json"))):
+            with open(path) as f:
+                records = json.load(f)
+            for record in records:
+                if "latitude" not in record or "longitude" not in record:
+                    continue
+                coordinates = (float(record["latitude"]), float(record["longitude"]))
+                if "city" in record:
+                    city = normalize_name(record["city"])
+                    self.places.setdefault(city, {})[
+                        normalize_name(record["name"])
+                    ] = coordinates
+                else:
+                    self.cities[normalize_name(record["name"])] = coordinates
+
+    def lookup(self, location: str, city: str) -> Optional[tuple[float, float]]:
+        """Return the coordinates of a location in a city, or None if it is not known.
+
+        Falls back to a known place name contained in `location` (e.g. "Colosseum entrance"), and to
+        the city itself when the location is the city name.
+        """
+        name, city = normalize_name(location), normalize_name(city)
+        places = self.places.get(city, {})
+        if name in places:
+            return places[name]
+        for place_name in sorted(places, key=len, reverse=True):
+            if re.search(rf"\b{re.escape(place_name)}\b", name):
+                return places[place_name]
+        if name == city or name in self.cities:
+            return self.cities.get(name)
+        return None
+
+    def lookup_city(self, city: str) -> Optional[tuple[float, float]]:
+        return self.cities.get(normalize_name(city))
+
+
+def haversine_meters(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """Great-circle distances between (lat, lng) arrays, broadcasting like any numpy operation."""
+    origins, destinations = np.radians(origins), np.radians(destinations)
+    delta = destinations - origins
+    a = (
+        np.sin(delta[..., 0] / 2) ** 2
+        + np.cos(origins[..., 0])
+        * np.cos(destinations[..., 0])
+        * np.sin(delta[..., 1] / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+
+def estimate_travel(
+    origins: np.ndarray, destinations: np.ndarray, mode: str = "walking"
+) -> tuple[np.ndarray, np.ndarray]:
+    """Estimated route distance (meters) and duration (seconds) between coordinate arrays."""
+    meters = haversine_meters(origins, destinations) * DETOUR_FACTOR
+    return meters, meters / SPEED_METERS_PER_SECOND[mode]
+
+
+def estimated_leg(meters: float, seconds: float) -> dict:
+    """Format an estimate like a Maps API leg, marking the texts as approximate."""
+    meters, seconds = float(meters), float(seconds)
+    minutes = max(1, round(seconds / 60))
+    if minutes < 60:
+        duration_text = f"{minutes} min" + ("s" if minutes > 1 else "")
+    else:
+        hours, minutes = divmod(minutes, 60)
+        duration_text = f"{hours} hour" + ("s" if hours > 1 else "")
+        if minutes:
+            duration_text += f" {minutes} min" + ("s" if minutes > 1 else "")
+    if meters < 1000:
+        distance_text = f"{round(meters)} m"
+    else:
+        distance_text = f"{meters / 1000:.1f} km"
+    return {
+        "duration": {"text": f"~{duration_text}", "value": round(seconds)},
+        "distance": {"text": f"~{distance_text}", "value": round(meters)},
+        "estimated": True,
+    }
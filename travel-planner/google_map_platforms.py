@@ -1,5 +1,7 @@
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import numpy as np
 from pydantic import BaseModel
 import requests
 
@@ -7,6 +9,10 @@
     SwarmResult,
 )
 
+from gazetteer import Gazetteer, estimate_travel, estimated_leg
+from route_cache import RouteCache
+from route_optimizer import optimize_day_order
+
 
 class Event(BaseModel):
     type: str  # Attraction, Restaurant, Travel
@@ -23,7 +29,40 @@ class Itinerary(BaseModel):
     days: list[Day]
 
 
-def _fetch_travel_time(origin: str, destination: str) -> dict:
+# Route legs rarely change, so they are kept on disk and shared across planning sessions
+route_cache = RouteCache(
+    path=os.environ.get("ROUTE_CACHE_PATH", ".route_cache.sqlite"),
+    ttl_seconds=int(os.environ.get("ROUTE_CACHE_TTL_SECONDS", 30 * 24 * 3600)),
+    max_entries=int(os.environ.get("ROUTE_CACHE_MAX_ENTRIES", 10000)),
+)
+
+# How travel times are resolved: "directions" issues one Directions request per leg,
+# "distance_matrix" requests only the durations and distances of the legs, billed one element per leg
+TRAVEL_TIME_RESOLVER = os.environ.get("TRAVEL_TIME_RESOLVER", "directions")
+
+# Distance Matrix API limits per request
+MAX_MATRIX_ORIGINS = 25
+MAX_MATRIX_DESTINATIONS = 25
+MAX_MATRIX_ELEMENTS = 100
+
+# Coordinates of the known attractions, restaurants and cities, used to estimate legs offline
+gazetteer = Gazetteer(os.path.join(os.path.dirname(__file__), "trip_planner_data"))
+
+# Estimated legs up to this distance are used as is, longer ones are refined with the Maps API
+REFINE_LEGS_ABOVE_METERS = float(os.environ.get("REFINE_LEGS_ABOVE_METERS", 1500))
+
+# How travel between the cities of a multi-city trip is timed
+INTER_CITY_MODE = os.environ.get("INTER_CITY_MODE", "transit")
+
+# Reorder each day's events to minimise walking time before adding the travel legs
+OPTIMIZE_DAY_ROUTES = os.environ.get("OPTIMIZE_DAY_ROUTES", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+def _fetch_travel_time(origin: str, destination: str, mode: str = "walking") -> dict:
     """Retrieves route information using Google Maps Directions API.
     API documentation at https://developers.google.com/maps/documentation/directions/get-directions
     """
@@ -31,7 +70,7 @@ def _fetch_travel_time(origin: str, destination: str) -> dict:
     params = {
         "origin": origin,
         "destination": destination,
-        "mode": "walking",  # driving (default), bicycling, transit
+        "mode": mode,  # driving (default), walking, bicycling, transit
         "key": os.environ.get("GOOGLE_MAP_API_KEY"),
     }
 
@@ -45,69 +84,352 @@ def _fetch_travel_time(origin: str, destination: str) -> dict:
         }
 
 
+def _get_travel_leg(
+    origin: str, destination: str, mode: str = "walking"
+) -> Optional[dict]:
+    """Return the duration and distance of a leg, from the route cache when possible."""
+    leg = route_cache.get(origin, destination, mode)
+    if leg is not None:
+        return leg
+
+    maps_api_response = _fetch_travel_time(
+        origin=origin, destination=destination, mode=mode
+    )
+    try:
+        route_leg = maps_api_response["routes"][0]["legs"][0]
+        leg = {"duration": route_leg["duration"], "distance": route_leg["distance"]}
+    except Exception:
+        return None
+
+    route_cache.set(origin, destination, mode, leg)
+    return leg
+
+
+def _fetch_distance_matrix(
+    origins: list[str], destinations: list[str], mode: str = "walking"
+) -> dict:
+    """Retrieves travel durations and distances between many places using Google Maps Distance Matrix API.
+    API documentation at https://developers.google.com/maps/documentation/distance-matrix/distance-matrix
+    """
+    endpoint = "https://maps.googleapis.com/maps/api/distancematrix/json"
+    params = {
+        "origins": "|".join(origins),
+        "destinations": "|".join(destinations),
+        "mode": mode,
+        "key": os.environ.get("GOOGLE_MAP_API_KEY"),
+    }
+
+    response = requests.get(endpoint, params=params)
+    if response.status_code == 200:
+        return response.json()
+    else:
+        return {
+            "error": "Failed to retrieve the distance matrix",
+            "status_code": response.status_code,
+        }
+
+
+def _get_travel_matrix(pairs: list[tuple[str, str]], mode: str = "walking") -> dict:
+    """Return the legs between the given (origin, destination) pairs, keyed by pair.
+
+    Cached legs are reused. Distance Matrix bills every origin/destination element of a request, so
+    only the missing pairs are requested: origins missing the same destinations share a request, split
+    by the per-request origin, destination and element limits, and no other element is requested.
+    """
+    matrix = {}
+    missing = {}
+    for origin, destination in dict.fromkeys(pairs):
+        if origin == destination:
+            continue
+        leg = route_cache.get(origin, destination, mode)
+        if leg is None:
+            missing.setdefault(origin, []).append(destination)
+        else:
+            matrix[(origin, destination)] = leg
+
+    requests_by_destinations = {}
+    for origin, destinations in missing.items():
+        requests_by_destinations.setdefault(tuple(sorted(destinations)), []).append(
+            origin
+        )
+    for destinations, origins in requests_by_destinations.items():
+        column_size = min(
+            len(destinations), MAX_MATRIX_DESTINATIONS, MAX_MATRIX_ELEMENTS
+        )
+        row_size = max(1, min(MAX_MATRIX_ORIGINS, MAX_MATRIX_ELEMENTS // column_size))
+        for row_start in range(0, len(origins), row_size):
+            rows = origins[row_start : row_start + row_size]
+            for column_start in range(0, len(destinations), column_size):
+                columns = list(destinations[column_start : column_start + column_size])
+                maps_api_response = _fetch_distance_matrix(rows, columns, mode)
+                for origin, row in zip(rows, maps_api_response.get("rows", [])):
+                    for destination, element in zip(columns, row["elements"]):
+                        if element.get("status") != "OK":
+                            continue
+                        leg = {
+                            "duration": element["duration"],
+                            "distance": element["distance"],
+                        }
+                        route_cache.set(origin, destination, mode, leg)
+                        matrix[(origin, destination)] = leg
+
+    return matrix
+
+
+def _place(event: Event) -> str:
+    return ", ".join([event.location, event.city])
+
+
+def _geocode(events: list[Event]) -> Optional[np.ndarray]:
+    """Coordinates of the events from the gazetteer, or None if any event is unknown."""
+    coordinates = [gazetteer.lookup(event.location, event.city) for event in events]
+    if any(point is None for point in coordinates):
+        return None
+    return np.array(coordinates, dtype=float).reshape(-1, 2)
+
+
+def _estimate_day_legs(
+    events: list[Event], mode: str = "walking"
+) -> list[Optional[dict]]:
+    """Estimate the legs between consecutive events from the gazetteer in one vectorized pass."""
+    coordinates = [gazetteer.lookup(event.location, event.city) for event in events]
+    known = [
+        index
+        for index in range(len(events) - 1)
+        if coordinates[index] is not None and coordinates[index + 1] is not None
+    ]
+    legs = [None] * max(len(events) - 1, 0)
+    if known:
+        meters, seconds = estimate_travel(
+            np.array([coordinates[index] for index in known]),
+            np.array([coordinates[index + 1] for index in known]),
+            mode,
+        )
+        for index, leg_meters, leg_seconds in zip(known, meters, seconds):
+            legs[index] = estimated_leg(leg_meters, leg_seconds)
+    return legs
+
+
+def _get_day_legs(events: list[Event], mode: str = "walking") -> list[Optional[dict]]:
+    """Return the legs between consecutive events of a day.
+
+    Legs are first estimated offline; only unknown legs and legs longer than REFINE_LEGS_ABOVE_METERS
+    are requested from the Maps API with the configured resolver, keeping the estimate if that fails.
+    """
+    places = [_place(event) for event in events]
+    legs = _estimate_day_legs(events, mode)
+    if not os.environ.get("GOOGLE_MAP_API_KEY"):
+        return legs
+
+    refine = [
+        index
+        for index, leg in enumerate(legs)
+        if leg is None or leg["distance"]["value"] > REFINE_LEGS_ABOVE_METERS
+    ]
+    if TRAVEL_TIME_RESOLVER == "distance_matrix" and refine:
+        matrix = _get_travel_matrix(
+            [(places[index], places[index + 1]) for index in refine], mode
+        )
+        refined = [matrix.get((places[index], places[index + 1])) for index in refine]
+    else:
+        refined = [
+            _get_travel_leg(places[index], places[index + 1], mode) for index in refine
+        ]
+    for index, leg in zip(refine, refined):
+        if leg is not None:
+            legs[index] = leg
+    return legs
+
+
+def _optimize_day(day: Day) -> Optional[dict]:
+    """Reorder the events of a day in place, returning the optimizer report.
+
+    The travel-time matrix is estimated from the gazetteer when every event is known. Otherwise it is
+    requested from the Distance Matrix API, only if TRAVEL_TIME_RESOLVER is "distance_matrix" and a key
+    is set, so the optimizer never adds Distance Matrix requests the user didn't choose. Returns None,
+    leaving the day untouched, if the matrix could not be completed.
+    """
+    coordinates = _geocode(day.events)
+    if coordinates is not None:
+        _, matrix = estimate_travel(coordinates[:, None, :], coordinates[None, :, :])
+        matrix = matrix.tolist()
+    elif TRAVEL_TIME_RESOLVER != "distance_matrix" or not os.environ.get(
+        "GOOGLE_MAP_API_KEY"
+    ):
+        return None
+    else:
+        places = [_place(event) for event in day.events]
+        legs = _get_travel_matrix(
+            [(origin, destination) for origin in places for destination in places]
+        )
+        try:
+            matrix = [
+                [
+                    (
+                        0
+                        if origin == destination
+                        else legs[(origin, destination)]["duration"]["value"]
+                    )
+                    for destination in places
+                ]
+                for origin in places
+            ]
+        except KeyError:
+            return None
+
+    report = optimize_day_order([event.type for event in day.events], matrix)
+    day.events = [day.events[index] for index in report["order"]]
+    return report
+
+
+def _time_day(day: Day) -> Optional[dict]:
+    """Optimize the order of a day's events and add the travel legs between them, in place.
+
+    Returns the optimizer report, if the day was optimized.
+    """
+    report = None
+    if OPTIMIZE_DAY_ROUTES:
+        report = _optimize_day(day)
+        if report is not None:
+            report.pop("order")
+
+    events = day.events
+    legs = _get_day_legs(events)
+    new_events = events[:1]
+    for index in range(1, len(events)):
+        pre_event, cur_event = events[index - 1], events[index]
+        leg = legs[index - 1]
+        if leg is not None:
+            travel_time_txt = f"{leg['duration']['text']}, ({leg['distance']['text']})"
+            new_events.append(
+                Event(
+                    type="Travel",
+                    location=f"walking from {pre_event.location} to {cur_event.location}",
+                    city=cur_event.city,
+                    description=travel_time_txt,
+                )
+            )
+        else:
+            print(
+                f"Note: Unable to get travel time from {_place(pre_event)} to {_place(cur_event)}"
+            )
+        new_events.append(cur_event)
+    day.events = new_events
+    return report
+
+
+def _day_city(day: Day) -> str:
+    """The city a day is spent in, the one most of its events are in."""
+    cities = [event.city for event in day.events if event.type != "Travel"]
+    return max(dict.fromkeys(cities), key=cities.count) if cities else ""
+
+
+def _split_by_city(days: list[Day]) -> dict:
+    """Split a trip into per-city sub-plans, mapping each city to its (1-based) day numbers."""
+    cities = {}
+    for day_number, day in enumerate(days, 1):
+        cities.setdefault(_day_city(day), []).append(day_number)
+    return cities
+
+
+def _get_inter_city_leg(origin: str, destination: str) -> Optional[dict]:
+    """Travel between two cities with INTER_CITY_MODE, from the Maps API or estimated offline."""
+    leg = None
+    if os.environ.get("GOOGLE_MAP_API_KEY"):
+        leg = _get_travel_leg(origin, destination, INTER_CITY_MODE)
+    if leg is None:
+        origin_point = gazetteer.lookup_city(origin)
+        destination_point = gazetteer.lookup_city(destination)
+        if origin_point is not None and destination_point is not None:
+            meters, seconds = estimate_travel(
+                np.array(origin_point), np.array(destination_point), INTER_CITY_MODE
+            )
+            leg = estimated_leg(meters, seconds)
+    return leg
+
+
+def _add_inter_city_legs(days: list[Day]) -> None:
+    """Stitch the per-city sub-plans together, starting each day in a new city with the transit leg."""
+    for previous_day, day in zip(days, days[1:]):
+        origin, destination = _day_city(previous_day), _day_city(day)
+        if not origin or not destination or origin == destination:
+            continue
+        leg = _get_inter_city_leg(origin, destination)
+        if leg is None:
+            print(f"Note: Unable to get travel time from {origin} to {destination}")
+            continue
+        day.events.insert(
+            0,
+            Event(
+                type="Travel",
+                location=f"{INTER_CITY_MODE} from {origin} to {destination}",
+                city=destination,
+                description=f"{leg['duration']['text']}, ({leg['distance']['text']})",
+            ),
+        )
+
+
 def update_itinerary_with_travel_times(context_variables: dict) -> SwarmResult:
     """Update the complete itinerary with travel times between each event."""
     """
-    Retrieves route information using Google Maps Directions API.
+    Retrieves route information using Google Maps Directions API, or Distance Matrix API when
+    TRAVEL_TIME_RESOLVER is set to "distance_matrix".
+    With OPTIMIZE_DAY_ROUTES, days whose events are all in the gazetteer are reordered from offline
+    estimates; other days are only reordered with the "distance_matrix" resolver, from the
+    durations between every pair of their events, and are otherwise kept in the order given.
     API documentation at https://developers.google.com/maps/documentation/directions/get-directions
     """
 
     # Ensure that we have a structured itinerary, if not, back to the structured_output_agent to make it
-    if context_variables.get("structured_itinerary") is None:
+    itinerary_store = context_variables.get("itinerary_store")
+    if itinerary_store is None:
         return SwarmResult(
             agent="structured_output_agent",
             values="Structured itinerary not found, please create the structured output, structured_output_agent.",
         )
-    elif "timed_itinerary" in context_variables:
+    elif itinerary_store.timed:
+        # Unchanged since it was timed, so this reuses the serialized itinerary
         return SwarmResult(
-            values="Timed itinerary already done, inform the customer that their itinerary is ready!"
+            values="Timed itinerary already done, inform the customer that their itinerary is ready!\n"
+            + itinerary_store.to_json()
         )
 
-    # Process the itinerary, converting it back to an object and working through each event to work out travel time and distance
-    itinerary_object = Itinerary.model_validate(
-        json.loads(context_variables["structured_itinerary"])
-    )
-    for day in itinerary_object.days:
-        events = day.events
-        new_events = []
-        pre_event, cur_event = None, None
-        event_count = len(events)
-        index = 0
-        while index < event_count:
-            if index > 0:
-                pre_event = events[index - 1]
-
-            cur_event = events[index]
-            if pre_event:
-                origin = ", ".join([pre_event.location, pre_event.city])
-                destination = ", ".join([cur_event.location, cur_event.city])
-                maps_api_response = _fetch_travel_time(
-                    origin=origin, destination=destination
-                )
-                try:
-                    leg = maps_api_response["routes"][0]["legs"][0]
-                    travel_time_txt = (
-                        f"{leg['duration']['text']}, ({leg['distance']['text']})"
-                    )
-                    new_events.append(
-                        Event(
-                            type="Travel",
-                            location=f"walking from {pre_event.location} to {cur_event.location}",
-                            city=cur_event.city,
-                            description=travel_time_txt,
-                        )
-                    )
-                except Exception:
-                    print(
-                        f"Note: Unable to get travel time from {origin} to {destination}"
-                    )
-            new_events.append(cur_event)
-            index += 1
-        day.events = new_events
+    # Work through each event of the validated itinerary, in place, to work out travel time and distance
+    # Each city's days are timed concurrently, so a multi-city trip takes as long as its slowest city
+    days = itinerary_store.itinerary.days
+    cities = _split_by_city(days)
+    with ThreadPoolExecutor(max_workers=max(1, len(cities))) as executor:
+        city_reports = executor.map(
+            lambda day_numbers: [_time_day(days[number - 1]) for number in day_numbers],
+            cities.values(),
+        )
+        optimization_reports = [
+            {"day": day_number, **report}
+            for day_numbers, reports in zip(cities.values(), city_reports)
+            for day_number, report in zip(day_numbers, reports)
+            if report is not None
+        ]
+    optimization_reports.sort(key=lambda report: report["day"])
+    _add_inter_city_legs(days)
 
-    context_variables["timed_itinerary"] = itinerary_object.model_dump()
+    itinerary_store.timed = True
+    itinerary_store.mark_changed()
+    # Serialized once for this version, for the route timing agent and anything reading the context
+    context_variables["timed_itinerary"] = itinerary_store.to_json()
+    cache_stats = route_cache.stats()
+    context_variables["route_cache_stats"] = cache_stats
+    context_variables["route_optimization"] = optimization_reports
+    original_minutes = round(
+        sum(report["original_travel_seconds"] for report in optimization_reports) / 60
+    )
+    optimized_minutes = round(
+        sum(report["optimized_travel_seconds"] for report in optimization_reports) / 60
+    )
 
     return SwarmResult(
         context_variables=context_variables,
-        values="Timed itinerary added to context with travel times",
+        values="Timed itinerary added to context with travel times "
+        + f"(route cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses; "
+        + f"route optimization: {original_minutes} -> {optimized_minutes} minutes of walking):\n"
+        + context_variables["timed_itinerary"],
     )
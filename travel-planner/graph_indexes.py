@@ -0,0 +1,46 @@
+from graphrag_sdk import Ontology
+
+# Attributes the planners filter on, indexed in addition to the unique ones
+FILTER_ATTRIBUTES = {"rating", "food_type", "type"}
+
+
+def ontology_indexes(
+    ontology: Ontology, filter_attributes: set = FILTER_ATTRIBUTES
+) -> list[tuple[str, str, bool]]:
+    """(label, attribute, unique) for every unique or filtered attribute of the ontology's entities."""
+    return [
+        (entity.label, attribute.name, attribute.unique)
+        for entity in ontology.entities
+        for attribute in entity.attributes
+        if attribute.unique or attribute.name in filter_attributes
+    ]
+
+
+def create_ontology_indexes(graph, ontology: Ontology) -> list[str]:
+    """Create the indexes and uniqueness constraints matching the ontology, skipping existing ones.
+
+    FalkorDB range indexes serve both range (e.g. rating >= 4.5) and exact-match (e.g. name or
+    food_type equality) lookups. Uniqueness constraints need such an index on the same attribute.
+    Returns a description of each index and constraint created.
+    """
+    existing = {
+        (row[0], attribute)
+        for row in graph.query("CALL db.indexes() YIELD label, properties").result_set
+        for attribute in row[1]
+    }
+    created = []
+    for label, attribute, unique in ontology_indexes(ontology):
+        if (label, attribute) not in existing:
+            graph.query(f"CREATE INDEX FOR (n:{label}) ON (n.{attribute})")
+            created.append(f"index on {label}.{attribute}")
+        if unique:
+            try:
+                graph.create_node_unique_constraint(label, attribute)
+                created.append(f"unique constraint on {label}.{attribute}")
+            except Exception as e:
+                # Already exists, or the data has duplicates (possible after LLM extraction)
+                if "already exists" not in str(e).lower():
+                    print(
+                        f"Note: Unable to create unique constraint on {label}.{attribute}: {e}"
+                    )
+    return created
@@ -0,0 +1,236 @@
+import re
+import statistics
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+from autogen.agentchat.contrib.graph_rag.graph_query_engine import (
+    GraphStoreQueryResult,
+)
+
+# Words that don't change the meaning of a question about restaurants or attractions
+STOPWORDS = set(
+    """a about all an and any are at available best can could customer day days do eat find for
+    from give good have i in information is list located looking me need of on options or please
+    provide recommend recommendations restaurant restaurants attraction attractions see separately
+    show some the there things to top trip us visit want we what where which with you""".split()
+)
+
+LABEL_KEYWORDS = {
+    "Restaurant": r"\b(restaurants?|places to eat|food|lunch|dinner)\b",
+    "Attraction": r"\b(attractions?|sights|things to do|places to visit|landmarks)\b",
+}
+
+# Filters that apply to each entity, the others are ignored for it
+LABEL_FILTERS = {
+    "Restaurant": ("city", "min_rating", "food_type"),
+    "Attraction": ("city", "type"),
+}
+
+
+RATING_PATTERN = r"\brat(?:ed|ing)\s+(?:of\s+)?(?:above|over|at least|more than|>=?)\s*(\d(?:\.\d+)?)"
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase and strip punctuation, keeping decimal points (e.g. a 4.5 rating)."""
+    question = re.sub(r"[^a-z0-9.]+", " ", question.lower())
+    return " ".join(re.sub(r"(?<!\d)\.|\.(?!\d)", " ", question).split())
+
+
+# Start of a message in the conversation the capability sends as the question, "name: content"
+# messages separated by blank lines
+MESSAGE_HEADER = r"(?:\A|\n\n)\w*: "
+
+
+def _last_message(question: str) -> str:
+    """The whole last message of the conversation sent as the question, or the question itself."""
+    headers = list(re.finditer(MESSAGE_HEADER, question))
+    if not headers:
+        return question.strip()
+    return question[headers[-1].end() :].strip()
+
+
+def format_percentiles(latencies: list[float]) -> str:
+    if len(latencies) < 2:
+        return f"n={len(latencies)}" + (f" {latencies[0]:.1f}ms" if latencies else "")
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return f"n={len(latencies)} p50={cuts[49]:.1f}ms p90={cuts[89]:.1f}ms p99={cuts[98]:.1f}ms"
+
+
+class CachedGraphQueryEngine:
+    """Wraps a FalkorGraphQueryEngine to answer repeated and common questions without the LLM.
+
+    Questions asking for restaurants or attractions filtered by city, rating, food type or attraction
+    type are answered with prepared, parameterized Cypher templates; anything else goes to the wrapped
+    engine. Answers are memoized until the ingestion manifest version changes.
+    """
+
+    def __init__(self, query_engine, graph, manifest, max_entries: int = 256):
+        self.query_engine = query_engine
+        self.graph = graph
+        self.manifest = manifest
+        self.max_entries = max_entries
+        self.latencies = defaultdict(list)
+        self._answers = OrderedDict()
+        self._prepared = {}
+        self._vocabulary = None
+        self._version = None
+        # The wrapped engine keeps one chat session, so LLM queries are made one at a time
+        self._llm_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == "query_engine":
+            raise AttributeError(name)
+        return getattr(self.query_engine, name)
+
+    def _invalidate_if_changed(self) -> None:
+        if self.manifest.version != self._version:
+            self._answers.clear()
+            self._vocabulary = None
+            self._version = self.manifest.version
+
+    def _values(self, cypher: str) -> dict:
+        """Lowercased value to stored value, for matching values mentioned in a question."""
+        return {
+            row[0].lower(): row[0]
+            for row in self.graph.query(cypher).result_set
+            if isinstance(row[0], str)
+        }
+
+    @property
+    def vocabulary(self) -> dict:
+        if self._vocabulary is None:
+            self._vocabulary = {
+                "city": self._values("MATCH (c:City) RETURN c.name"),
+                "food_type": self._values(
+                    "MATCH (r:Restaurant) RETURN DISTINCT r.food_type"
+                ),
+                "type": self._values("MATCH (a:Attraction) RETURN DISTINCT a.type"),
+            }
+        return self._vocabulary
+
+    def match_intent(self, question: str) -> Optional[tuple]:
+        """Parse a question into (labels, filters) if a template can answer it completely."""
+        message = _last_message(question)
+        # A request over several lines, e.g. a list, can ask for more than one template answers
+        if "\n" in message:
+            return None
+        text = normalize_question(message)
+        labels = tuple(
+            label
+            for label, pattern in LABEL_KEYWORDS.items()
+            if re.search(pattern, text)
+        )
+        if not labels:
+            return None
+
+        filters = {}
+        rating = re.search(RATING_PATTERN, text)
+        if rating:
+            filters["min_rating"] = float(rating.group(1))
+            text = text.replace(rating.group(0), " ")
+        for attribute, values in self.vocabulary.items():
+            for value in sorted(values, key=len, reverse=True):
+                if re.search(rf"\b{re.escape(value)}\b", text):
+                    filters[attribute] = values[value]
+                    text = re.sub(rf"\b{re.escape(value)}\b", " ", text)
+                    break
+        for pattern in LABEL_KEYWORDS.values():
+            text = re.sub(pattern, " ", text)
+
+        # Anything left that isn't filler could change the answer, so let the LLM handle it
+        residue = [word for word in text.split() if word not in STOPWORDS]
+        if residue or not all(
+            set(filters) & set(LABEL_FILTERS[label]) for label in labels
+        ):
+            return None
+        return labels, tuple(sorted(filters.items()))
+
+    def _template(self, label: str, filter_names: tuple) -> str:
+        key = (label, filter_names)
+        if key not in self._prepared:
+            conditions = {
+                "city": "c.name = $city",
+                "min_rating": "e.rating >= $min_rating",
+                "food_type": "e.food_type = $food_type",
+                "type": "e.type = $type",
+            }
+            where = [conditions[name] for name in filter_names]
+            self._prepared[key] = (
+                f"MATCH (e:{label})-[:IN_CITY]->(c:City) "
+                + (f"WHERE {' AND '.join(where)} " if where else "")
+                + "RETURN e.name, c.name, e.description, e.rating, e.food_type, e.type "
+                + "ORDER BY e.rating DESC, e.name"
+            )
+        return self._prepared[key]
+
+    def _answer_from_template(self, labels: tuple, filters: tuple) -> str:
+        sections = []
+        for label in labels:
+            parameters = {
+                name: value for name, value in filters if name in LABEL_FILTERS[label]
+            }
+            filter_names = tuple(parameters)
+            rows = self.graph.query(
+                self._template(label, filter_names), parameters
+            ).result_set
+            lines = []
+            for name, city, description, rating, food_type, attraction_type in rows:
+                details = ", ".join(
+                    str(value)
+                    for value in (food_type or attraction_type, rating)
+                    if value is not None
+                )
+                line = f"- {name} ({city}{', ' + details if details else ''})"
+                lines.append(f"{line}: {description}" if description else line)
+            sections.append(
+                f"{label}s:\n"
+                + ("\n".join(lines) if lines else f"No {label.lower()}s found.")
+            )
+        return "\n\n".join(sections)
+
+    def query(
+        self, question: str, n_results: int = 1, **kwargs
+    ) -> GraphStoreQueryResult:
+        started = time.perf_counter()
+        with self._lock:
+            self._invalidate_if_changed()
+            intent = self.match_intent(question)
+            key = intent if intent is not None else normalize_question(question)
+            answer = self._answers.get(key)
+            if answer is not None:
+                self._answers.move_to_end(key)
+
+        if answer is not None:
+            source = "cache"
+        elif intent is not None:
+            source, answer = "template", self._answer_from_template(*intent)
+        else:
+            source = "llm"
+            with self._llm_lock:
+                answer = self.query_engine.query(question, n_results, **kwargs).answer
+
+        with self._lock:
+            if source != "cache" and answer:
+                self._answers[key] = answer
+                if len(self._answers) > self.max_entries:
+                    self._answers.popitem(last=False)
+            self.latencies[source].append((time.perf_counter() - started) * 1000)
+        return GraphStoreQueryResult(answer=answer, results=[])
+
+    def latency_report(self) -> str:
+        """Latency percentiles per answer source, and overall with and without the cache."""
+        lines = [
+            f"  {source}: {format_percentiles(latencies)}"
+            for source, latencies in self.latencies.items()
+        ]
+        all_latencies = [
+            value for values in self.latencies.values() for value in values
+        ]
+        lines.append(f"  with cache (all queries): {format_percentiles(all_latencies)}")
+        lines.append(
+            f"  without cache (LLM queries): {format_percentiles(self.latencies['llm'])}"
+        )
+        return "Graph query latency:\n" + "\n".join(lines)
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+
+from graphrag_sdk import Source
+
+
+def hash_document(path: str) -> str:
+    """SHA-256 of a document's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """Hashes of the documents ingested into each graph, used to tell which documents changed since."""
+
+    def __init__(self, graph_name: str, path: str = ".ingestion_manifest.json"):
+        self.graph_name = graph_name
+        self.path = path
+        self._manifest = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._manifest = json.load(f)
+
+    @property
+    def documents(self) -> dict:
+        """Ingested document paths and their hashes for this graph."""
+        return self._manifest.get(self.graph_name, {})
+
+    @property
+    def version(self) -> str:
+        """Fingerprint of everything ingested into the graph, changes whenever a document is ingested."""
+        return hashlib.sha256(
+            json.dumps(self.documents, sort_keys=True).encode()
+        ).hexdigest()[:16]
+
+    def changed_documents(self, documents: list) -> list:
+        """The documents that are new or whose contents differ from when they were ingested."""
+        return [
+            document
+            for document in documents
+            if self.documents.get(os.path.abspath(document.path_or_url))
+            != hash_document(document.path_or_url)
+        ]
+
+    def record(self, documents: list) -> None:
+        """Mark documents as ingested in their current state and save the manifest."""
+        entries = self._manifest.setdefault(self.graph_name, {})
+        for document in documents:
+            entries[os.path.abspath(document.path_or_url)] = hash_document(
+                document.path_or_url
+            )
+        with open(self.path, "w") as f:
+            json.dump(self._manifest, f, indent=2)
+
+    def reset(self) -> None:
+        self._manifest.pop(self.graph_name, None)
+
+
+def init_or_connect_db(
+    query_engine, documents: list, manifest: IngestionManifest
+) -> str:
+    """Connect to the existing graph and ingest only new or changed documents.
+
+    The graph is initialized from all documents if it has never been ingested or no longer exists
+    in the database. Returns a short description of what was done.
+    """
+    if manifest.documents:
+        try:
+            query_engine.connect_db()
+        except ValueError:
+            # The graph is gone, e.g. the database container was recreated
+            manifest.reset()
+
+    if not manifest.documents:
+        # A graph with no manifest (deleted to force a re-ingestion, or ingested before there was one)
+        # is deleted with its ontology first, as init_db refuses to create a graph that exists
+        query_engine.delete()
+        query_engine.init_db(input_doc=documents)
+        manifest.record(documents)
+        return f"initialized from {len(documents)} documents"
+
+    changed = manifest.changed_documents(documents)
+    if changed:
+        try:
+            query_engine.add_records(changed)
+        except NotImplementedError:
+            query_engine.knowledge_graph.process_sources(
+                [Source(document.path_or_url) for document in changed]
+            )
+        manifest.record(changed)
+        return f"connected, ingested {len(changed)} new or changed documents"
+    return "connected, all documents up to date"
@@ -0,0 +1,34 @@
+from typing import Optional
+
+from google_map_platforms import Itinerary
+
+
+class ItineraryStore:
+    """The one validated Itinerary shared by the agents through the context variables.
+
+    The itinerary is parsed and validated once when it comes from the LLM, then mutated in place.
+    Every change bumps `version`, and JSON is only produced when the itinerary goes back to an LLM,
+    at most once per version.
+    """
+
+    def __init__(self, itinerary: Itinerary):
+        self.itinerary = itinerary
+        self.version = 0
+        self.timed = False
+        self._json: Optional[str] = None
+        self._json_version: Optional[int] = None
+
+    @classmethod
+    def from_json(cls, itinerary_json: str) -> "ItineraryStore":
+        """Parse and validate an itinerary from the structured output, raising a ValidationError if invalid."""
+        return cls(Itinerary.model_validate_json(itinerary_json))
+
+    def mark_changed(self) -> None:
+        """Record an in-place change to the itinerary."""
+        self.version += 1
+
+    def to_json(self) -> str:
+        if self._json_version != self.version:
+            self._json = self.itinerary.model_dump_json()
+            self._json_version = self.version
+        return self._json
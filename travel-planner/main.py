@@ -3,8 +3,11 @@
 
 # IMPORTS
 import copy
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict
 
+from pydantic import ValidationError
+
 
 from autogen.agentchat.contrib.swarm_agent import (
     AFTER_WORK,
@@ -16,6 +19,7 @@
     initiate_swarm_chat,
 )
 from autogen.agentchat.contrib.graph_rag.document import Document, DocumentType
+from falkordb import FalkorDB
 from graphrag_sdk.models.openai import OpenAiGenerativeModel
 from autogen.agentchat.contrib.graph_rag.falkor_graph_query_engine import (
     FalkorGraphQueryEngine,
@@ -26,7 +30,12 @@
 
 # local file imports
 from ontology import get_trip_ontology
+from graph_indexes import create_ontology_indexes
+from graph_query_cache import CachedGraphQueryEngine
+from ingestion_manifest import IngestionManifest, init_or_connect_db
+from structured_loader import load_or_connect_db
 from google_map_platforms import Itinerary, update_itinerary_with_travel_times
+from itinerary_store import ItineraryStore
 
 # ---------------------------------------------------------------------
 # ---------------------------------------------------------------------
@@ -69,20 +78,43 @@
 # Get the ontology
 trip_data_ontology = get_trip_ontology()
 
+falkordb_host = "0.0.0.0"  # Change
+falkordb_port = 6379  # if needed
+falkordb = FalkorDB(host=falkordb_host, port=falkordb_port)
+
 # Create FalkorGraphQueryEngine
 query_engine = FalkorGraphQueryEngine(
     name="trip_data",
-    host="0.0.0.0",  # Change
-    port=6379,  # if needed
+    host=falkordb_host,
+    port=falkordb_port,
     ontology=trip_data_ontology,
     model=OpenAiGenerativeModel("gpt-4o"),
 )
 
-# Ingest data and initialize the database
-query_engine.init_db(input_doc=input_documents)
+# The trip data is already structured, so by default it is mapped onto the ontology and loaded
+# directly. Set to False to have the LLM extract the entities from the documents instead.
+use_structured_loader = True
+
+# Ingest data and initialize the database on the first run, afterwards connect to the existing
+# graph and only ingest the documents that are new or changed since (tracked in .ingestion_manifest.json)
+ingestion_manifest = IngestionManifest(graph_name="trip_data")
+if use_structured_loader:
+    ingestion = load_or_connect_db(
+        query_engine,
+        falkordb,
+        input_documents,
+        ingestion_manifest,
+        trip_data_ontology,
+    )
+else:
+    ingestion = init_or_connect_db(query_engine, input_documents, ingestion_manifest)
+print(f"Trip data graph: {ingestion}")
 
-# If you have already ingested and created the database, you can use this connect_db instead of init_db
-# query_engine.connect_db()
+# Index the unique and commonly filtered attributes of the ontology (name, rating, food_type, type)
+for index in create_ontology_indexes(
+    falkordb.select_graph(query_engine.name), trip_data_ontology
+):
+    print(f"Created {index}")
 
 
 # ---------------------------------------------------------------------
@@ -92,7 +124,7 @@
 trip_context = {
     "itinerary_confirmed": False,
     "itinerary": "",
-    "structured_itinerary": None,
+    "itinerary_store": None,
 }
 
 
@@ -122,7 +154,16 @@ def create_structured_itinerary(
             values="Itinerary not confirmed, please confirm the itinerary with the customer first.",
         )
 
-    context_variables["structured_itinerary"] = structured_itinerary
+    # Parse and validate the itinerary once, the agents after this share and update the same object
+    try:
+        context_variables["itinerary_store"] = ItineraryStore.from_json(
+            structured_itinerary
+        )
+    except ValidationError as e:
+        return SwarmResult(
+            agent="structured_output_agent",
+            values=f"Structured itinerary is not in the required format, please correct it: {e}",
+        )
 
     # This will update the context variables and then transfer to the Route Timing agent
     return SwarmResult(
@@ -132,16 +173,32 @@ def create_structured_itinerary(
     )
 
 
+def get_city_options(cities: list[str]) -> str:
+    """Get the restaurants and attractions of all the cities of a multi-city trip at once."""
+    # Each city is retrieved concurrently, so this takes as long as the slowest city
+    with ThreadPoolExecutor(max_workers=max(1, len(cities))) as executor:
+        answers = executor.map(
+            lambda city: cached_query_engine.query(
+                f"Restaurants and attractions in {city}"
+            ).answer,
+            cities,
+        )
+        return "\n\n".join(
+            f"{city}:\n{answer}" for city, answer in zip(cities, answers)
+        )
+
+
 # Planner agent, interacting with the customer and GraphRag agent, to create an itinerary
 planner_agent = SwarmAgent(
     name="planner_agent",
     system_message="You are a trip planner agent. It is important to know where the customer is going, how many days, what they want to do."
     + "You will work with another agent, graphrag_agent, to get information about restaurant and attractions. "
     + "You are also working with the customer, so you must ask the customer what they want to do if you don’t have LOCATION, NUMBER OF DAYS, MEALS, and ATTRACTIONS. "
-    + "When you have the customer's requirements, work with graphrag_agent to get information for an itinerary."
+    + "When you have the customer's requirements, work with graphrag_agent to get information for an itinerary. "
+    + "If the trip covers more than one city, call get_city_options once with all the cities instead, and plan the days city by city. "
     + "You are responsible for creating the itinerary and for each day in the itinerary you MUST HAVE events and EACH EVENT MUST HAVE a 'type' ('Restaurant' or 'Attraction'), 'location' (name of restaurant or attraction), 'city', and 'description'. "
     + "Finally, YOU MUST ask the customer if they are happy with the itinerary before marking the itinerary as complete.",
-    functions=[mark_itinerary_as_complete],
+    functions=[mark_itinerary_as_complete, get_city_options],
     llm_config=llm_config,
 )
 
@@ -151,8 +208,12 @@ def create_structured_itinerary(
     system_message="Return a list of restaurants and/or attractions. List them separately and provide ALL the options in the location. Do not provide travel advice.",
 )
 
-# Adding the FalkorDB capability to the agent
-graph_rag_capability = FalkorGraphRagCapability(query_engine)
+# Adding the FalkorDB capability to the agent, answering common questions (e.g. restaurants in Rome)
+# with prepared Cypher templates and repeated ones from a cache instead of LLM-generated queries
+cached_query_engine = CachedGraphQueryEngine(
+    query_engine, falkordb.select_graph(query_engine.name), ingestion_manifest
+)
+graph_rag_capability = FalkorGraphRagCapability(cached_query_engine)
 graph_rag_capability.add_to_agent(graphrag_agent)
 
 # Structured Output agent, formatting the itinerary into a structured format through the response_format on the LLM Configuration
@@ -216,27 +277,26 @@ def create_structured_itinerary(
 )
 
 
-def print_itinerary(itinerary_data):
+def print_itinerary(itinerary: Itinerary):
     header = "█             █\n █           █ \n  █  █████  █  \n   ██     ██   \n  █         █  \n █  ███████  █ \n █ ██ ███ ██ █ \n   █████████   \n\n ██   ███ ███  \n█  █ █       █ \n████ █ ██  ██  \n█  █ █  █ █    \n█  █  ██  ████ \n"
     width = 80
     icons = {"Travel": "🚶", "Restaurant": "🍽️", "Attraction": "🏛️"}
 
     for line in header.split("\n"):
         print(line.center(width))
-    print(
-        f"Itinerary for {itinerary_data['days'][0]['events'][0]['city']}".center(width)
-    )
+    cities = dict.fromkeys(event.city for day in itinerary.days for event in day.events)
+    print(f"Itinerary for {', '.join(cities)}".center(width))
     print("=" * width)
 
-    for day_num, day in enumerate(itinerary_data["days"], 1):
+    for day_num, day in enumerate(itinerary.days, 1):
         print(f"\nDay {day_num}".center(width))
         print("-" * width)
 
-        for event in day["events"]:
-            event_type = event["type"]
-            print(f"\n  {icons[event_type]} {event['location']}")
+        for event in day.events:
+            event_type = event.type
+            print(f"\n  {icons[event_type]} {event.location}")
             if event_type != "Travel":
-                words = event["description"].split()
+                words = event.description.split()
                 line = "    "
                 for word in words:
                     if len(line) + len(word) + 1 <= 76:
@@ -247,11 +307,21 @@ def print_itinerary(itinerary_data):
                 if line.strip():
                     print(line)
             else:
-                print(f"    {event['description']}")
+                print(f"    {event.description}")
         print("\n" + "-" * width)
 
 
-if "timed_itinerary" in context_variables:
-    print_itinerary(context_variables["timed_itinerary"])
+itinerary_store = context_variables.get("itinerary_store")
+if itinerary_store is not None and itinerary_store.timed:
+    print_itinerary(itinerary_store.itinerary)
+    if "route_cache_stats" in context_variables:
+        print(f"Route cache: {context_variables['route_cache_stats']}")
+    for report in context_variables.get("route_optimization", []):
+        print(
+            f"Day {report['day']} route ({report['method']}): walking "
+            + f"{report['original_travel_seconds'] // 60} -> {report['optimized_travel_seconds'] // 60} minutes, "
+            + f"optimized in {report['runtime_ms']} ms"
+        )
 else:
     print("No itinerary available to print.")
+print(cached_query_engine.latency_report())
@@ -0,0 +1,93 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+def normalize_place(place: str) -> str:
+    """Normalize a place so that differently cased or punctuated names share a cache entry."""
+    return " ".join(place.lower().replace(",", " ").split())
+
+
+class RouteCache:
+    """On-disk cache of route legs (duration and distance) keyed by origin, destination and mode.
+
+    Entries older than `ttl_seconds` are treated as misses, and once more than `max_entries` legs
+    are stored the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = ".route_cache.sqlite",
+        ttl_seconds: int = 30 * 24 * 3600,
+        max_entries: int = 10000,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS routes ("
+            "key TEXT PRIMARY KEY, leg TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(origin: str, destination: str, mode: str) -> str:
+        return "|".join(
+            [normalize_place(origin), normalize_place(destination), mode.lower()]
+        )
+
+    def get(self, origin: str, destination: str, mode: str) -> Optional[dict]:
+        """Return the cached leg, or None if it is missing or expired."""
+        key = self.make_key(origin, destination, mode)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT leg, created_at FROM routes WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE routes SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, origin: str, destination: str, mode: str, leg: dict) -> None:
+        key = self.make_key(origin, destination, mode)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO routes (key, leg, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(leg), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM routes WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM routes").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM routes WHERE key IN "
+                "(SELECT key FROM routes ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
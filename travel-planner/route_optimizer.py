@@ -0,0 +1,207 @@
+import time
+from typing import Optional
+
+# A day starts at 9am; all times are in seconds since midnight
+DAY_START = 9 * 3600
+
+# Time spent at each type of event
+DWELL_SECONDS = {"Attraction": 90 * 60, "Restaurant": 75 * 60}
+
+# Restaurants must be reached within a meal window (lunch, dinner), each meal used at most once
+MEAL_WINDOWS = [(12 * 3600, 14 * 3600 + 1800), (19 * 3600, 21 * 3600 + 1800)]
+
+# Idle time waiting for a meal window is penalised like walking time, so that a day
+# doesn't start with a three hour wait for lunch
+WAIT_WEIGHT = 1.0
+
+# Days with up to this many events are solved exactly, larger days use a local-search heuristic
+EXACT_MAX_EVENTS = 10
+
+
+def _visit(
+    event_type: str, clock: float, meal: int
+) -> Optional[tuple[float, int, float]]:
+    """Arrive at an event at `clock`, returning the clock on leaving, the last meal window used and
+    the time spent waiting for it.
+
+    Returns None if a restaurant cannot be reached within a meal window later than `meal`.
+    """
+    wait = 0.0
+    if event_type == "Restaurant":
+        for window, (window_start, window_end) in enumerate(MEAL_WINDOWS):
+            if window > meal and clock <= window_end:
+                wait, meal = max(0.0, window_start - clock), window
+                break
+        else:
+            return None
+    return (
+        clock + wait + DWELL_SECONDS.get(event_type, DWELL_SECONDS["Attraction"]),
+        meal,
+        wait,
+    )
+
+
+def route_travel_seconds(order: list[int], matrix: list[list[float]]) -> float:
+    """Total travel time of visiting the events in `order`."""
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+
+def _schedule(
+    order: list[int], event_types: list[str], matrix: list[list[float]]
+) -> Optional[float]:
+    """Return the cost (travel plus weighted waiting) of `order`, or None if it breaks a meal window."""
+    clock, meal, cost = DAY_START, -1, 0.0
+    for position, index in enumerate(order):
+        if position:
+            leg = matrix[order[position - 1]][index]
+            cost += leg
+            clock += leg
+        visit = _visit(event_types[index], clock, meal)
+        if visit is None:
+            return None
+        clock, meal, wait = visit
+        cost += WAIT_WEIGHT * wait
+    return cost
+
+
+def _dominates(label: tuple, other: tuple) -> bool:
+    """Whether a (cost, clock, meal, path) label is at least as good as `other` for every completion.
+
+    An earlier label can always idle until the other's clock, paying for the wait, so it dominates
+    when it has used no later meal window and its cost plus that wait is no higher.
+    """
+    return (
+        label[1] <= other[1]
+        and label[2] <= other[2]
+        and label[0] + WAIT_WEIGHT * (other[1] - label[1]) <= other[0]
+    )
+
+
+def _solve_exact(
+    event_types: list[str], matrix: list[list[float]]
+) -> Optional[list[int]]:
+    """Held-Karp dynamic programme over (visited set, last event).
+
+    Each state keeps the non-dominated (cost, clock, meal) labels, as a route with a higher cost
+    can still be the only one that reaches a later restaurant in time.
+    """
+    n = len(event_types)
+    states = {}
+    for index in range(n):
+        visit = _visit(event_types[index], DAY_START, -1)
+        if visit is not None:
+            states[(1 << index, index)] = [
+                (WAIT_WEIGHT * visit[2], visit[0], visit[1], (index,))
+            ]
+
+    for _ in range(n - 1):
+        next_states = {}
+        for (mask, last), labels in states.items():
+            for index in range(n):
+                if mask & (1 << index):
+                    continue
+                leg = matrix[last][index]
+                for cost, clock, meal, path in labels:
+                    visit = _visit(event_types[index], clock + leg, meal)
+                    if visit is None:
+                        continue
+                    label = (
+                        cost + leg + WAIT_WEIGHT * visit[2],
+                        visit[0],
+                        visit[1],
+                        path + (index,),
+                    )
+                    front = next_states.setdefault((mask | (1 << index), index), [])
+                    if any(_dominates(other, label) for other in front):
+                        continue
+                    front[:] = [
+                        other for other in front if not _dominates(label, other)
+                    ]
+                    front.append(label)
+        states = next_states
+
+    labels = [label for front in states.values() for label in front]
+    if not labels:
+        return None
+    return list(min(labels, key=lambda label: label[0])[3])
+
+
+def _solve_heuristic(
+    event_types: list[str], matrix: list[list[float]]
+) -> Optional[list[int]]:
+    """Feasible nearest-neighbour construction from every start, improved by relocate and 2-opt moves."""
+    n = len(event_types)
+    best_order, best_cost = None, None
+    for start in range(n):
+        order = [start]
+        remaining = set(range(n)) - {start}
+        while remaining:
+            candidates = sorted(remaining, key=lambda index: matrix[order[-1]][index])
+            for index in candidates:
+                # Only accept an event if the remaining restaurants can still make their meals
+                restaurants = [
+                    other
+                    for other in candidates
+                    if other != index and event_types[other] == "Restaurant"
+                ]
+                if (
+                    _schedule(order + [index] + restaurants, event_types, matrix)
+                    is not None
+                ):
+                    break
+            else:
+                index = candidates[0]
+            order.append(index)
+            remaining.remove(index)
+        cost = _schedule(order, event_types, matrix)
+        if cost is not None and (best_cost is None or cost < best_cost):
+            best_order, best_cost = order, cost
+
+    if best_order is None:
+        return None
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                reversed_order = (
+                    best_order[:i] + best_order[i : j + 1][::-1] + best_order[j + 1 :]
+                )
+                relocated = best_order[:i] + best_order[i + 1 :]
+                relocated.insert(j, best_order[i])
+                for candidate in (reversed_order, relocated):
+                    cost = _schedule(candidate, event_types, matrix)
+                    if cost is not None and cost < best_cost - 1e-9:
+                        best_order, best_cost = candidate, cost
+                        improved = True
+    return best_order
+
+
+def optimize_day_order(event_types: list[str], matrix: list[list[float]]) -> dict:
+    """Order a day's events to minimise travel (and idle) time while keeping restaurants within meal windows.
+
+    `matrix[a][b]` is the travel time in seconds from event a to event b. Returns the new order along
+    with the original and optimized travel time, the method used and the optimizer runtime. If no
+    ordering satisfies the meal windows, the original order is kept.
+    """
+    started = time.perf_counter()
+    n = len(event_types)
+    original = list(range(n))
+    if n < 2:
+        order, method = original, "unchanged"
+    elif n <= EXACT_MAX_EVENTS:
+        order, method = _solve_exact(event_types, matrix), "exact"
+    else:
+        order, method = _solve_heuristic(event_types, matrix), "heuristic"
+
+    if order is None:
+        order, method = original, "infeasible"
+
+    return {
+        "order": order,
+        "method": method,
+        "original_travel_seconds": round(route_travel_seconds(original, matrix)),
+        "optimized_travel_seconds": round(route_travel_seconds(order, matrix)),
+        "runtime_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,160 @@
+import json
+import os
+
+from graphrag_sdk import Ontology
+
+from graph_indexes import create_ontology_indexes
+
+# Rows sent per UNWIND query
+BATCH_SIZE = 5000
+
+# Which ontology entity the records of each trip data file are
+FILE_LABELS = {
+    "attractions.json": "Attraction",
+    "cities.json": "City",
+    "restaurants.json": "Restaurant",
+}
+
+
+def _unique_attributes(ontology: Ontology, label: str) -> list[str]:
+    entity = ontology.get_entity_with_label(label)
+    return [attribute.name for attribute in entity.attributes if attribute.unique]
+
+
+def build_graph_rows(records_by_label: dict, ontology: Ontology) -> tuple[dict, dict]:
+    """Map structured records onto the ontology.
+
+    Only the attributes the ontology defines for an entity are kept. For every relation of an entity,
+    the record field named after the target entity (e.g. `city` for IN_CITY -> City) holds the name of
+    the target, which is created if no record defines it.
+
+    Returns the node rows per label and the edge rows per (relation, source, target) label.
+    """
+    nodes = {}
+    edges = {}
+    for label, records in records_by_label.items():
+        entity = ontology.get_entity_with_label(label)
+        attribute_names = [attribute.name for attribute in entity.attributes]
+        relations = [
+            relation
+            for relation in ontology.relations
+            if relation.source.label == label
+        ]
+        rows = nodes.setdefault(label, [])
+        for record in records:
+            rows.append(
+                {
+                    name: record[name]
+                    for name in attribute_names
+                    if record.get(name) is not None
+                }
+            )
+            for relation in relations:
+                target_name = record.get(relation.target.label.lower())
+                if target_name is None:
+                    continue
+                edges.setdefault(
+                    (relation.label, label, relation.target.label), []
+                ).append({"source": record["name"], "target": target_name})
+
+    # Create the relation targets that have no records of their own (e.g. Country, or Modena)
+    for (_, _, target_label), rows in edges.items():
+        target_rows = nodes.setdefault(target_label, [])
+        known = {row.get("name") for row in target_rows}
+        names = dict.fromkeys(
+            row["target"] for row in rows if row["target"] not in known
+        )
+        target_rows.extend({"name": name} for name in names)
+
+    return nodes, edges
+
+
+def _batches(rows: list):
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start : start + BATCH_SIZE]
+
+
+def insert_graph_rows(graph, nodes: dict, edges: dict, ontology: Ontology) -> int:
+    """Bulk insert nodes and edges with batched, parameterized UNWIND queries.
+
+    Nodes are merged on their unique attributes so reloading a document updates it in place.
+    Returns the number of queries issued.
+    """
+    queries = 0
+    for label, rows in nodes.items():
+        keys = _unique_attributes(ontology, label) or ["name"]
+        merge_keys = ", ".join(f"{key}: row.{key}" for key in keys)
+        cypher = f"UNWIND $rows AS row MERGE (n:{label} {{{merge_keys}}}) SET n += row"
+        for batch in _batches(rows):
+            graph.query(cypher, {"rows": batch})
+            queries += 1
+
+    for (relation, source, target), rows in edges.items():
+        cypher = (
+            "UNWIND $rows AS row "
+            f"MATCH (s:{source} {{name: row.source}}) "
+            f"MATCH (t:{target} {{name: row.target}}) "
+            f"MERGE (s)-[:{relation}]->(t)"
+        )
+        for batch in _batches(rows):
+            graph.query(cypher, {"rows": batch})
+            queries += 1
+    return queries
+
+
+def load_trip_documents(
+    falkordb,
+    graph_name: str,
+    documents: list,
+    ontology: Ontology,
+    ontology_graph_name: str,
+) -> int:
+    """Load trip data documents straight into the graph, without LLM extraction.
+
+    The ontology's indexes are created first so that every MERGE is an index lookup, and the ontology
+    is saved to `ontology_graph_name`, the query engine's `ontology_table_name`, where
+    FalkorGraphQueryEngine.connect_db() loads it from.
+    Returns the number of records loaded.
+    """
+    records_by_label = {}
+    for document in documents:
+        label = FILE_LABELS[os.path.basename(document.path_or_url)]
+        with open(document.path_or_url) as f:
+            records_by_label.setdefault(label, []).extend(json.load(f))
+
+    graph = falkordb.select_graph(graph_name)
+    create_ontology_indexes(graph, ontology)
+    nodes, edges = build_graph_rows(records_by_label, ontology)
+    insert_graph_rows(graph, nodes, edges, ontology)
+
+    if ontology_graph_name not in falkordb.list_graphs():
+        ontology.save_to_graph(falkordb.select_graph(ontology_graph_name))
+
+    return sum(len(records) for records in records_by_label.values())
+
+
+def load_or_connect_db(
+    query_engine, falkordb, documents: list, manifest, ontology: Ontology
+) -> str:
+    """Structured counterpart of `init_or_connect_db`: load the new or changed documents directly,
+    then connect the query engine to the graph. Returns a short description of what was done.
+    """
+    if query_engine.name not in falkordb.list_graphs():
+        # The graph is gone, e.g. the database container was recreated
+        manifest.reset()
+
+    changed = manifest.changed_documents(documents)
+    if changed:
+        record_count = load_trip_documents(
+            falkordb,
+            query_engine.name,
+            changed,
+            ontology,
+            query_engine.ontology_table_name,
+        )
+        manifest.record(changed)
+    query_engine.connect_db()
+
+    if changed:
+        return f"loaded {record_count} records from {len(changed)} new or changed documents"
+    return "connected, all documents up to date"
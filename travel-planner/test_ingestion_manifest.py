@@ -0,0 +1,129 @@
+import json
+
+import pytest
+from autogen.agentchat.contrib.graph_rag.document import Document, DocumentType
+
+from ingestion_manifest import IngestionManifest, init_or_connect_db
+
+
+class FakeKnowledgeGraph:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def process_sources(self, sources):
+        self.engine.calls.append(
+            ("process_sources", [source.path for source in sources])
+        )
+
+
+class FakeQueryEngine:
+    """Stands in for FalkorGraphQueryEngine, with the database's graphs kept in a set.
+
+    Like the real engine, init_db raises if the graph's ontology is already saved, connect_db raises if
+    the graph doesn't exist and add_records isn't supported.
+    """
+
+    def __init__(self, graphs: set):
+        self.name = "trip_data"
+        self.ontology_table_name = self.name + "_ontology"
+        self.graphs = graphs
+        self.knowledge_graph = None
+        self.calls = []
+
+    def connect_db(self):
+        self.calls.append(("connect_db",))
+        if self.name not in self.graphs:
+            raise ValueError(f"Knowledge graph '{self.name}' does not exist")
+        self.knowledge_graph = FakeKnowledgeGraph(self)
+
+    def init_db(self, input_doc):
+        self.calls.append(("init_db", [doc.path_or_url for doc in input_doc]))
+        if self.ontology_table_name in self.graphs:
+            raise ValueError(f"Knowledge graph {self.name} is already created.")
+        self.graphs.update([self.name, self.ontology_table_name])
+        self.knowledge_graph = FakeKnowledgeGraph(self)
+
+    def add_records(self, new_records):
+        raise NotImplementedError("This method is not supported by FalkorDB SDK yet.")
+
+    def delete(self):
+        self.calls.append(("delete",))
+        self.graphs.difference_update([self.name, self.ontology_table_name])
+        return True
+
+
+@pytest.fixture
+def documents(tmp_path):
+    paths = []
+    for name in ["attractions", "cities", "restaurants"]:
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps([{"name": f"{name} 1", "city": "Rome"}]))
+        paths.append(str(path))
+    return [Document(doctype=DocumentType.JSON, path_or_url=path) for path in paths]
+
+
+def run(graphs, documents, manifest_path):
+    engine = FakeQueryEngine(graphs)
+    manifest = IngestionManifest("trip_data", str(manifest_path))
+    return engine, init_or_connect_db(engine, documents, manifest)
+
+
+def test_first_run_ingests_every_document(tmp_path, documents):
+    engine, result = run(set(), documents, tmp_path / "manifest.json")
+
+    paths = [doc.path_or_url for doc in documents]
+    assert engine.calls == [("delete",), ("init_db", paths)]
+    assert result == "initialized from 3 documents"
+    assert (
+        len(IngestionManifest("trip_data", str(tmp_path / "manifest.json")).documents)
+        == 3
+    )
+
+
+def test_no_changes_only_connects(tmp_path, documents):
+    graphs = set()
+    run(graphs, documents, tmp_path / "manifest.json")
+
+    engine, result = run(graphs, documents, tmp_path / "manifest.json")
+
+    assert engine.calls == [("connect_db",)]
+    assert result == "connected, all documents up to date"
+
+
+def test_changed_document_is_ingested_alone(tmp_path, documents):
+    graphs = set()
+    run(graphs, documents, tmp_path / "manifest.json")
+    changed = documents[2].path_or_url
+    with open(changed, "w") as f:
+        json.dump([{"name": "restaurants 2", "city": "Rome"}], f)
+
+    engine, result = run(graphs, documents, tmp_path / "manifest.json")
+
+    assert engine.calls == [("connect_db",), ("process_sources", [changed])]
+    assert result == "connected, ingested 1 new or changed documents"
+    engine, result = run(graphs, documents, tmp_path / "manifest.json")
+    assert engine.calls == [("connect_db",)]
+
+
+def test_existing_graph_without_manifest_is_rebuilt(tmp_path, documents):
+    # Ingested by an earlier version or with the manifest deleted to force a re-ingestion
+    graphs = {"trip_data", "trip_data_ontology"}
+
+    engine, result = run(graphs, documents, tmp_path / "manifest.json")
+
+    paths = [doc.path_or_url for doc in documents]
+    assert engine.calls == [("delete",), ("init_db", paths)]
+    assert result == "initialized from 3 documents"
+    assert graphs == {"trip_data", "trip_data_ontology"}
+
+
+def test_missing_graph_is_reinitialized(tmp_path, documents):
+    graphs = set()
+    run(graphs, documents, tmp_path / "manifest.json")
+    graphs.clear()
+
+    engine, result = run(graphs, documents, tmp_path / "manifest.json")
+
+    paths = [doc.path_or_url for doc in documents]
+    assert engine.calls == [("connect_db",), ("delete",), ("init_db", paths)]
+    assert result == "initialized from 3 documents"